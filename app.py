@@ -1,8 +1,13 @@
 from flask import Flask, render_template, make_response
 from flask_cors import CORS
 from mongo_client import mongo
+from models.indexes import ensure_indexes, check_indexes
+from utils.json_provider import BSONJSONProvider
 from config import MONGO_URI, MONGO_DBNAME, UPLOAD_FOLDER
 import os
+import sys
+import time
+import importlib
 from flask_jwt_extended import JWTManager
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
@@ -19,7 +24,35 @@ def ensure_mongo_db_in_uri(uri, db_name):
         return uri
     return urlunsplit((parsed.scheme, parsed.netloc, f'/{db_name}', parsed.query, parsed.fragment))
 
+# Modules that should only be imported on first use, never at startup.
+HEAVY_MODULES = ['whisper', 'torch', 'speech_recognition', 'pyttsx3']
+startup_report = []
+
+
+def import_blueprint(module_name, *names):
+    """Import a route module and record how long it took and how many modules it pulled in"""
+    modules_before = len(sys.modules)
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    startup_report.append({
+        'module': module_name,
+        'import_ms': round((time.perf_counter() - start) * 1000, 1),
+        'new_modules': len(sys.modules) - modules_before
+    })
+    return [getattr(module, name) for name in names]
+
+
+def print_startup_report():
+    print('Blueprint import cost:')
+    for entry in startup_report:
+        print(f"  {entry['module']:20} {entry['import_ms']:8.1f} ms  {entry['new_modules']:4} modules")
+    loaded_heavy = [m for m in HEAVY_MODULES if m in sys.modules]
+    if loaded_heavy:
+        print(f"  WARNING: heavy modules loaded at startup: {', '.join(loaded_heavy)}")
+
 app = Flask(__name__)
+# jsonify encodes ObjectId/datetime itself, so routes can return Mongo documents as they are
+app.json = BSONJSONProvider(app)
 CORS(app, origins=["http://127.0.0.1:5500", "http://127.0.0.1:5501", "http://localhost:5500", "http://localhost:5501"], supports_credentials=True)  # Allow multiple frontend origins
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config["MONGO_URI"] = ensure_mongo_db_in_uri(MONGO_URI, MONGO_DBNAME)
@@ -35,13 +68,16 @@ mongo.init_app(app)
 # Use mongo.db directly throughout the app
 
 # Register blueprints
-from routes.auth import auth_bp, user_bp
-from routes.voice import voice_bp
-from routes.feedback import feedback_bp
-from routes.profile import profile_bp
-from routes.dashboard import dashboard_bp
-from routes.admin import admin_bp
-from routes.session import session_bp
+auth_bp, user_bp = import_blueprint('routes.auth', 'auth_bp', 'user_bp')
+voice_bp, = import_blueprint('routes.voice', 'voice_bp')
+feedback_bp, = import_blueprint('routes.feedback', 'feedback_bp')
+profile_bp, = import_blueprint('routes.profile', 'profile_bp')
+dashboard_bp, = import_blueprint('routes.dashboard', 'dashboard_bp')
+admin_bp, = import_blueprint('routes.admin', 'admin_bp')
+session_bp, = import_blueprint('routes.session', 'session_bp')
+app.config['STARTUP_REPORT'] = startup_report
+if os.getenv('STARTUP_REPORT', '').lower() in ('1', 'true', 'yes'):
+    print_startup_report()
 
 CORS(auth_bp, origins=["http://127.0.0.1:5500", "http://127.0.0.1:5501", "http://localhost:5500", "http://localhost:5501"], supports_credentials=True)
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -53,6 +89,20 @@ app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
 app.register_blueprint(admin_bp, url_prefix='/api/admin')
 app.register_blueprint(session_bp, url_prefix='/api/session')
 
+# Indexes are built by manage_indexes.py. ENSURE_INDEXES=create/verify opts into doing it at
+# import time; the default (off) keeps cold starts and CLI scripts free of index round-trips.
+index_mode = os.getenv('ENSURE_INDEXES', 'off').lower()
+if index_mode in ('create', 'verify'):
+    try:
+        if index_mode == 'create':
+            ensure_indexes()
+        else:
+            for collection, problems in check_indexes().items():
+                if problems['missing'] or problems['conflicting']:
+                    print(f"WARNING: indexes on {collection}: missing {problems['missing']}, conflicting {problems['conflicting']}")
+    except Exception as e:
+        print(f"Index check failed: {e}")
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(e):
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Daily rollup backfill for SkillSpeak AI
+Rebuilds the daily_rollups collection (signups, sessions, feedback, suggestions,
+active users per day) from the raw collections. Run once after deploying rollups,
+or with --since to repair recent days:  python backfill_rollups.py --since 2025-01-01
+"""
+
+import argparse
+from datetime import datetime
+
+from app import app  # binds mongo to the configured database
+from models.rollups import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the daily_rollups collection')
+    parser.add_argument('--since', type=lambda s: datetime.strptime(s, '%Y-%m-%d'), default=None,
+                        help='Only rebuild days from this date (YYYY-MM-DD); default rebuilds all history')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print("📊 Rebuilding daily rollups...")
+        days = rebuild_rollups(since=args.since)
+    print(f"✅ {days} daily rollup rows written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ This script will create all necessary collections and indexes for SkillSpeak AI
 from mongo_client import mongo
 from datetime import datetime
 from bson import ObjectId
+from models.indexes import ensure_indexes
 
 def init_database():
     """Initialize the database with all required collections"""
@@ -35,32 +36,8 @@ def create_indexes():
     """Create indexes for better query performance"""
     print("🔍 Creating database indexes...")
     
-    # Users collection indexes
-    mongo.db.users.create_index("email", unique=True)
-    mongo.db.users.create_index("role")
-    mongo.db.users.create_index("status")
-    mongo.db.users.create_index("created_at")
-    
-    # Session collection indexes
-    mongo.db.session.create_index("session_id", unique=True)
-    mongo.db.session.create_index("user_id")
-    mongo.db.session.create_index("created_at")
-    
-    # Feedback collection indexes
-    mongo.db.feedback.create_index("user_id")
-    mongo.db.feedback.create_index("created_at")
-    
-    # Suggest feedback collection indexes
-    mongo.db.suggest_feedback.create_index("user_id")
-    mongo.db.suggest_feedback.create_index("status")
-    mongo.db.suggest_feedback.create_index("created_at")
-    
-    # System settings collection indexes
-    mongo.db.system_settings.create_index("setting_key", unique=True)
-    mongo.db.system_settings.create_index("category")
-    mongo.db.system_settings.create_index("updated_at")
-    
-
+    # Declared per collection in models/indexes.py, next to the queries they serve
+    ensure_indexes()
     
     print("✅ Indexes created successfully!")
 
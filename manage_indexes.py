@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Index management for SkillSpeak AI
+Creates the indexes declared in models/indexes.py, or checks/report on them:
+  python manage_indexes.py            # create missing indexes
+  python manage_indexes.py --check    # exit 1 if any declared index is missing (CI/deploy gate)
+  python manage_indexes.py --report   # $indexStats usage: unused and undeclared indexes
+"""
+
+import argparse
+import os
+import sys
+
+# This script decides what to create; don't let app import build indexes first
+os.environ['ENSURE_INDEXES'] = 'off'
+from app import app  # binds mongo to the configured database
+from models.indexes import INDEXES, ensure_indexes, check_indexes, index_usage_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create, verify or report on MongoDB indexes')
+    parser.add_argument('--collection', action='append', dest='collections', choices=sorted(INDEXES),
+                        help='Limit to this collection (repeatable); default is every collection')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--check', action='store_true', help='Only verify; do not create anything')
+    mode.add_argument('--report', action='store_true', help='Show $indexStats usage per index')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.report:
+            for name, report in index_usage_report(args.collections).items():
+                print(f"📊 {name}")
+                for index_name, ops in sorted(report['usage'].items()):
+                    print(f"   {index_name:50} {ops:10} ops")
+                if report['missing']:
+                    print(f"   ❌ missing: {', '.join(report['missing'])}")
+                if report['unused']:
+                    print(f"   ⚠️  unused: {', '.join(report['unused'])}")
+                if report['undeclared']:
+                    print(f"   ⚠️  not in registry: {', '.join(report['undeclared'])}")
+            return
+
+        if not args.check:
+            print("🔍 Creating missing indexes...")
+            ensure_indexes(args.collections)
+
+        problems = {name: p for name, p in check_indexes(args.collections).items() if p['missing'] or p['conflicting']}
+    for name, p in problems.items():
+        if p['missing']:
+            print(f"❌ {name}: missing {', '.join(p['missing'])}")
+        if p['conflicting']:
+            print(f"⚠️  {name}: options differ from the registry for {', '.join(p['conflicting'])}")
+    if any(p['missing'] for p in problems.values()):
+        sys.exit(1)
+    print("✅ All declared indexes are present.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Transcript migration for SkillSpeak AI
+Moves the embedded session.chats arrays into transcript_buckets documents
+(TRANSCRIPT_BUCKET_SIZE turns each). Safe to re-run; already migrated sessions
+are skipped:  python migrate_transcripts.py
+"""
+
+import argparse
+
+from app import app  # binds mongo to the configured database
+from models.transcript import migrate_all_sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move session.chats arrays into transcript buckets')
+    parser.add_argument('--batch-size', type=int, default=500, help='Sessions fetched per cursor batch')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print("📦 Migrating session transcripts...")
+        migrated = migrate_all_sessions(
+            batch_size=args.batch_size,
+            log=lambda count: print(f"   {count} sessions migrated...")
+        )
+    print(f"✅ {migrated} sessions migrated.")
+
+
+if __name__ == "__main__":
+    main()
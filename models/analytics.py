@@ -0,0 +1,229 @@
+from mongo_client import mongo
+from datetime import datetime, timedelta
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+def _day_key(field):
+    return {'$dateToString': {'format': '%Y-%m-%d', 'date': field}}
+
+def _week_of_month_key(field):
+    # 7-day weeks counted from the 1st of the month: days 1-7 -> 1, 8-14 -> 2, ...
+    return {'$add': [{'$floor': {'$divide': [{'$subtract': [{'$dayOfMonth': field}, 1]}, 7]}}, 1]}
+
+def _month_key(field):
+    return {'$month': field}
+
+def date_stages(field='created_at', start=None, end=None, legacy_strings=False, output='_date'):
+    """Pipeline stages exposing `field` as a real date in `output`, optionally limited to [start, end).
+
+    With legacy_strings, ISO-8601 strings (older documents) are parsed server-side;
+    unparseable values are dropped, like the old Python fromisoformat loops did.
+    """
+    date_range = {}
+    if start is not None:
+        date_range['$gte'] = start
+    if end is not None:
+        date_range['$lt'] = end
+    if not legacy_strings:
+        match = {field: date_range} if date_range else {field: {'$type': 'date'}}
+        return [{'$match': match}, {'$addFields': {output: f'${field}'}}]
+    date_match = {field: date_range} if date_range else {field: {'$type': 'date'}}
+    stages = [
+        # Keep the indexable range match for real dates, let strings through to be parsed
+        {'$match': {'$or': [date_match, {field: {'$type': 'string'}}]}},
+        {'$addFields': {output: {'$cond': [
+            {'$eq': [{'$type': f'${field}'}, 'string']},
+            {'$dateFromString': {'dateString': f'${field}', 'onError': None, 'onNull': None}},
+            f'${field}'
+        ]}}},
+        {'$match': {output: {'$type': 'date'}}}
+    ]
+    if date_range:
+        stages.append({'$match': {output: date_range}})
+    return stages
+
+def count_by_bucket(collection_name, group_key, start=None, end=None, legacy_strings=False):
+    """{bucket: count} of documents created in [start, end), bucketed by group_key(date_field)"""
+    pipeline = date_stages('created_at', start, end, legacy_strings) + [
+        {'$group': {'_id': group_key('$_date'), 'count': {'$sum': 1}}}
+    ]
+    counts = {}
+    for doc in mongo.db[collection_name].aggregate(pipeline):
+        # $floor/$add yield floats for the week buckets; normalise keys before lookup
+        key = int(doc['_id']) if isinstance(doc['_id'], float) else doc['_id']
+        counts[key] = doc['count']
+    return counts
+
+def chart_buckets(mode, now):
+    """Return (start, end, group key builder, bucket keys, labels) for a chart mode"""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end = today + timedelta(days=1)
+    if mode == 'week':
+        # Last 7 days, up to today
+        start = today - timedelta(days=6)
+        days = [start + timedelta(days=i) for i in range(7)]
+        return start, end, _day_key, [d.strftime('%Y-%m-%d') for d in days], [d.strftime('%b %d') for d in days]
+    if mode == 'month':
+        # Current month in 7-day weeks counted from the 1st, up to the current week
+        start = today.replace(day=1)
+        weeks = list(range(1, (now.day - 1) // 7 + 2))
+        return start, end, _week_of_month_key, weeks, [f'Week {w}' for w in weeks]
+    if mode == 'year':
+        # Current year by month, up to the current month
+        start = datetime(now.year, 1, 1)
+        months = list(range(1, now.month + 1))
+        return start, end, _month_key, months, [datetime(now.year, m, 1).strftime('%b') for m in months]
+    return None
+
+def user_growth_series(mode='week', now=None):
+    """Signups per bucket for the user dashboard charts; also counts legacy string created_at values"""
+    now = now or datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if mode == 'week':
+        # Last 7 days, group by day
+        days = [today - timedelta(days=i) for i in range(6, -1, -1)]
+        counts = count_by_bucket('users', _day_key, days[0], today + timedelta(days=1), legacy_strings=True)
+        return {'labels': [d.strftime('%a') for d in days], 'data': [counts.get(d.strftime('%Y-%m-%d'), 0) for d in days]}
+    if mode == 'month':
+        # Current month, group by week (1-4)
+        start = today.replace(day=1)
+        end = datetime(now.year + 1, 1, 1) if now.month == 12 else datetime(now.year, now.month + 1, 1)
+        counts = count_by_bucket('users', _week_of_month_key, start, end, legacy_strings=True)
+        weeks = [1, 2, 3, 4]
+        return {'labels': [f'Week {w}' for w in weeks], 'data': [counts.get(w, 0) for w in weeks]}
+    if mode == 'year':
+        # Current year, group by month
+        counts = count_by_bucket('users', _month_key, datetime(now.year, 1, 1), datetime(now.year + 1, 1, 1), legacy_strings=True)
+        months = list(range(1, 13))
+        return {'labels': [datetime(now.year, m, 1).strftime('%b') for m in months], 'data': [counts.get(m, 0) for m in months]}
+    return {'labels': [], 'data': []}
+
+def users_with_positive_streak():
+    """(daily, non_daily) split on the stored numeric users.streak field"""
+    pipeline = [
+        {'$group': {
+            '_id': None,
+            'daily': {'$sum': {'$cond': [{'$and': [
+                {'$isNumber': '$streak'},
+                {'$gt': ['$streak', 0]}
+            ]}, 1, 0]}},
+            'total': {'$sum': 1}
+        }}
+    ]
+    docs = list(mongo.db.users.aggregate(pipeline))
+    if not docs:
+        return 0, 0
+    return docs[0]['daily'], docs[0]['total'] - docs[0]['daily']
+
+def users_with_recent_daily_sessions(streak_days=3, now=None):
+    """(daily, non_daily) users, where daily means a session on each of the last `streak_days` days"""
+    now = now or datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=streak_days - 1)
+    pipeline = [{'$match': {'user_id': {'$nin': [None, '']}}}]
+    pipeline += date_stages('created_at', start, today + timedelta(days=1), legacy_strings=True)
+    pipeline += [
+        {'$group': {'_id': {'user': {'$toString': '$user_id'}, 'day': _day_key('$_date')}}},
+        {'$group': {'_id': '$_id.user', 'days': {'$sum': 1}}},
+        {'$match': {'days': streak_days}},
+        # Only count ids that belong to an existing user (session.user_id holds str(ObjectId))
+        {'$addFields': {'user_oid': {'$convert': {'input': '$_id', 'to': 'objectId', 'onError': None, 'onNull': None}}}},
+        {'$lookup': {'from': 'users', 'localField': 'user_oid', 'foreignField': '_id', 'as': 'user'}},
+        {'$match': {'user': {'$ne': []}}},
+        {'$count': 'daily'}
+    ]
+    docs = list(mongo.db.session.aggregate(pipeline))
+    daily = docs[0]['daily'] if docs else 0
+    return daily, mongo.db.users.count_documents({}) - daily
+
+def users_with_consecutive_day_sessions():
+    """(daily, non_daily) session users, where daily means sessions on at least two consecutive days"""
+    pipeline = [{'$match': {'user_id': {'$nin': [None, '', 0, False]}}}]
+    pipeline += date_stages('created_at', legacy_strings=True)
+    pipeline += [
+        {'$group': {'_id': {'user': '$user_id', 'day': {'$dateTrunc': {'date': '$_date', 'unit': 'day'}}}}},
+        {'$setWindowFields': {
+            'partitionBy': '$_id.user',
+            'sortBy': {'_id.day': 1},
+            'output': {'prev_day': {'$shift': {'output': '$_id.day', 'by': -1}}}
+        }},
+        {'$group': {
+            '_id': '$_id.user',
+            'consecutive': {'$max': {'$cond': [
+                {'$eq': [{'$subtract': ['$_id.day', '$prev_day']}, DAY_MS]}, 1, 0
+            ]}}
+        }},
+        {'$group': {
+            '_id': None,
+            'daily': {'$sum': '$consecutive'},
+            'non_daily': {'$sum': {'$subtract': [1, '$consecutive']}}
+        }}
+    ]
+    docs = list(mongo.db.session.aggregate(pipeline))
+    if not docs:
+        return 0, 0
+    return docs[0]['daily'], docs[0]['non_daily']
+
+def users_active_today(now=None):
+    """(daily, non_daily) users by whether last_login (or created_at) falls on today"""
+    now = now or datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+    pipeline = [
+        {'$addFields': {'_last_seen': {'$ifNull': ['$last_login', '$created_at']}}},
+        {'$addFields': {'_last_seen': {'$cond': [
+            {'$eq': [{'$type': '$_last_seen'}, 'string']},
+            {'$dateFromString': {'dateString': '$_last_seen', 'onError': None, 'onNull': None}},
+            '$_last_seen'
+        ]}}},
+        {'$match': {'_last_seen': {'$type': 'date'}}},
+        {'$group': {
+            '_id': None,
+            'daily': {'$sum': {'$cond': [{'$and': [
+                {'$gte': ['$_last_seen', today]},
+                {'$lt': ['$_last_seen', tomorrow]}
+            ]}, 1, 0]}},
+            'total': {'$sum': 1}
+        }}
+    ]
+    docs = list(mongo.db.users.aggregate(pipeline))
+    if not docs:
+        return 0, 0
+    return docs[0]['daily'], docs[0]['total'] - docs[0]['daily']
+
+def count_many(specs):
+    """Run several counts in a single aggregation.
+
+    `specs` maps a result name to (collection, filter). Each count is its own
+    $match + $count branch, chained with $unionWith, so every branch is answered from
+    its collection's indexes (a count scan where the filter allows) rather than by
+    streaming documents through one shared pipeline.
+    """
+    if not specs:
+        return {}
+
+    def branch(name, query):
+        return [{'$match': query}, {'$count': 'n'}, {'$set': {'_name': name}}]
+
+    (first_name, (first_collection, first_query)), *rest = specs.items()
+    pipeline = branch(first_name, first_query)
+    for name, (collection, query) in rest:
+        pipeline.append({'$unionWith': {'coll': collection, 'pipeline': branch(name, query)}})
+    # $count emits nothing for an empty match, so absent names are zero
+    counts = {doc['_name']: doc['n'] for doc in mongo.db[first_collection].aggregate(pipeline)}
+    return {name: counts.get(name, 0) for name in specs}
+
+def get_admin_counts(now=None):
+    """All dashboard totals (users, admins, sessions, feedback, suggestions) in one round-trip"""
+    now = now or datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_range = {'$gte': today, '$lt': today + timedelta(days=1)}
+    return count_many({
+        'total_users': ('users', {}),
+        'admin_users': ('users', {'role': 'admin'}),
+        'today_admins': ('users', {'role': 'admin', 'created_at': today_range}),
+        'total_chats': ('session', {}),
+        'active_chats': ('session', {'status': 'active'}),
+        'total_feedback': ('feedback', {}),
+        'total_suggest_feedback': ('suggest_feedback', {})
+    })
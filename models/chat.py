@@ -1,7 +1,9 @@
 from mongo_client import mongo
 from datetime import datetime
+from models.pagination import paginate
+from utils.write_buffer import write_buffer
 
-def save_message(user_id, role, message, session_id=None, chat_id=None):
+def _message_doc(user_id, role, message, session_id=None, chat_id=None):
     doc = {
         "user_id": user_id,
         "role": role,
@@ -12,7 +14,14 @@ def save_message(user_id, role, message, session_id=None, chat_id=None):
         doc["session_id"] = session_id
     if chat_id:
         doc["chat_id"] = chat_id
-    return mongo.db.chats.insert_one(doc)
+    return doc
+
+def save_message(user_id, role, message, session_id=None, chat_id=None):
+    return mongo.db.chats.insert_one(_message_doc(user_id, role, message, session_id, chat_id))
+
+def queue_message(user_id, role, message, session_id=None, chat_id=None):
+    """Buffered save_message: returns the new _id without waiting for the insert"""
+    return write_buffer.add('chats', _message_doc(user_id, role, message, session_id, chat_id))
 
 def get_chat_history(user_id, session_id=None, chat_id=None):
     query = {"user_id": user_id}
@@ -22,6 +31,19 @@ def get_chat_history(user_id, session_id=None, chat_id=None):
         query["chat_id"] = chat_id
     return list(mongo.db.chats.find(query).sort("timestamp", 1))
 
+def get_chat_history_page(user_id, session_id=None, chat_id=None, cursor=None, limit=None):
+    """One page of a conversation in chronological order. Returns (messages, next_cursor)."""
+    query = {"user_id": user_id}
+    if session_id:
+        query["session_id"] = session_id
+    if chat_id:
+        query["chat_id"] = chat_id
+    return paginate('chats', query, cursor=cursor, limit=limit, sort_field='timestamp', direction=1)
+
 def get_all_chats():
     """Get all chat messages for admin monitoring"""
-    return list(mongo.db.chats.find().sort("timestamp", -1)) 
\ No newline at end of file
+    return list(mongo.db.chats.find().sort("timestamp", -1))
+
+def get_chats_page(cursor=None, limit=None):
+    """One page of all chat messages (newest first) for admin monitoring"""
+    return paginate('chats', cursor=cursor, limit=limit, sort_field='timestamp')
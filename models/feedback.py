@@ -1,10 +1,32 @@
 from mongo_client import mongo
 from bson import ObjectId
 from datetime import datetime
+from models.rollups import record_event
+from models.pagination import paginate
+from utils.write_buffer import write_buffer
 
 def create_feedback(feedback_data):
     feedback_data['created_at'] = datetime.utcnow()
-    return mongo.db.feedback.insert_one(feedback_data)
+    result = mongo.db.feedback.insert_one(feedback_data)
+    record_event('feedback', feedback_data['created_at'])
+    return result
+
+def _record_feedback_events(docs):
+    """Rollup counters for a flushed batch: one $inc per day instead of one per document"""
+    per_day = {}
+    for doc in docs:
+        day = doc['created_at'].replace(hour=0, minute=0, second=0, microsecond=0)
+        per_day[day] = per_day.get(day, 0) + 1
+    for day, amount in per_day.items():
+        record_event('feedback', day, amount=amount)
+
+write_buffer.register('feedback', after_flush=_record_feedback_events)
+
+def queue_feedback(feedback_items):
+    """Buffered create_feedback for several items; returns their _ids without waiting for the insert"""
+    now = datetime.utcnow()
+    docs = [{**item, 'created_at': now} for item in feedback_items]
+    return write_buffer.add_many('feedback', docs)
 
 def get_feedback_by_user(user_id):
     return list(mongo.db.feedback.find({'user_id': user_id}))
@@ -13,7 +35,7 @@ def get_feedback_by_id(feedback_id):
     return mongo.db.feedback.find_one({'_id': ObjectId(feedback_id)})
 
 def update_feedback(feedback_id, update_data):
-    return mongo.db.feedback.update_one({'_id': ObjectId(feedback_id)}, {'$set': update_data})
+    return mongo.db.feedback.update_one({'_id': ObjectId(feedback_id)}, {'$set': {**update_data, 'updated_at': datetime.utcnow()}})
 
 def delete_feedback(feedback_id):
     return mongo.db.feedback.delete_one({'_id': ObjectId(feedback_id)})
@@ -21,10 +43,21 @@ def delete_feedback(feedback_id):
 def get_all_feedback():
     return list(mongo.db.feedback.find())
 
+def get_feedback_page(cursor=None, limit=None, user_id=None, status=None):
+    """One page of feedback (newest first), optionally for one user/status. Returns (feedback, next_cursor)."""
+    query = {}
+    if user_id is not None:
+        query['user_id'] = user_id
+    if status is not None:
+        query['status'] = status
+    return paginate('feedback', query, cursor=cursor, limit=limit)
+
 def create_suggest_feedback(suggest_data):
     suggest_data['created_at'] = datetime.utcnow()
     suggest_data['status'] = suggest_data.get('status', 'seen')
-    return mongo.db.suggest_feedback.insert_one(suggest_data)
+    result = mongo.db.suggest_feedback.insert_one(suggest_data)
+    record_event('suggestions', suggest_data['created_at'])
+    return result
 
 def get_suggest_feedback_by_user(user_id):
     return list(mongo.db.suggest_feedback.find({'user_id': user_id}))
@@ -32,8 +65,13 @@ def get_suggest_feedback_by_user(user_id):
 def get_all_suggest_feedback():
     return list(mongo.db.suggest_feedback.find())
 
+def get_suggest_feedback_page(cursor=None, limit=None, user_id=None):
+    """One page of suggestions (newest first), optionally for one user. Returns (suggestions, next_cursor)."""
+    query = {'user_id': user_id} if user_id is not None else {}
+    return paginate('suggest_feedback', query, cursor=cursor, limit=limit)
+
 def update_suggest_feedback_status(suggest_id, status):
-    return mongo.db.suggest_feedback.update_one({'_id': ObjectId(suggest_id)}, {'$set': {'status': status}})
+    return mongo.db.suggest_feedback.update_one({'_id': ObjectId(suggest_id)}, {'$set': {'status': status, 'updated_at': datetime.utcnow()}})
 
 def delete_suggest_feedback(suggest_id):
     return mongo.db.suggest_feedback.delete_one({'_id': ObjectId(suggest_id)}) 
\ No newline at end of file
@@ -0,0 +1,163 @@
+from mongo_client import mongo
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+import os
+
+def interview_state_ttl():
+    return int(os.getenv('INTERVIEW_STATE_TTL', '86400'))
+
+# Every index the app relies on, next to the query it serves. Keyset pagination
+# (models/pagination.py) sorts on (field, _id), so list indexes end in _id.
+INDEXES = {
+    'users': [
+        # get_user_by_email (login/signup)
+        IndexModel([('email', ASCENDING)], unique=True),
+        # get_users_page, recent users on the dashboards
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)]),
+        # get_admin_counts: role == 'admin', optionally created today
+        IndexModel([('role', ASCENDING), ('created_at', DESCENDING)]),
+        IndexModel([('status', ASCENDING)]),
+        # admin chats: legacy session.user_id holds a user name
+        IndexModel([('name', ASCENDING)]),
+        # incremental backups (utils/exporter.CHANGE_FIELDS)
+        IndexModel([('updated_at', ASCENDING)])
+    ],
+    'session': [
+        IndexModel([('session_id', ASCENDING)], unique=True),
+        # get_sessions_page(user_id=...), get_user_stats last activity
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+        # get_session_summaries, recent sessions
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)]),
+        # get_admin_counts active_chats
+        IndexModel([('status', ASCENDING)]),
+        IndexModel([('updated_at', ASCENDING)])
+    ],
+    'transcript_buckets': [
+        # append_turns / get_turns range reads
+        IndexModel([('session_id', ASCENDING), ('bucket', ASCENDING)], unique=True),
+        IndexModel([('updated_at', ASCENDING)])
+    ],
+    'chats': [
+        # get_chat_history(_page) for one session, in timestamp order
+        IndexModel([('user_id', ASCENDING), ('session_id', ASCENDING), ('timestamp', ASCENDING), ('_id', ASCENDING)]),
+        # get_chat_history(_page) across a user's sessions
+        IndexModel([('user_id', ASCENDING), ('timestamp', ASCENDING), ('_id', ASCENDING)]),
+        # get_chats_page (admin monitoring, newest first)
+        IndexModel([('timestamp', DESCENDING), ('_id', DESCENDING)])
+    ],
+    'feedback': [
+        # get_feedback_page(user_id=...), get_feedback_by_user
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+        # pending feedback for admin review
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('updated_at', ASCENDING)])
+    ],
+    'suggest_feedback': [
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('status', ASCENDING)]),
+        IndexModel([('updated_at', ASCENDING)])
+    ],
+    'settings': [
+        # ai_config / feature_toggles documents are looked up and upserted by type
+        IndexModel([('type', ASCENDING)]),
+        IndexModel([('updated_at', ASCENDING)])
+    ],
+    'system_settings': [
+        IndexModel([('setting_key', ASCENDING)], unique=True),
+        IndexModel([('category', ASCENDING)]),
+        IndexModel([('updated_at', ASCENDING)])
+    ],
+    'interview_state': [
+        IndexModel([('interview_id', ASCENDING)], unique=True),
+        # Abandoned interviews expire INTERVIEW_STATE_TTL seconds after their last step
+        IndexModel([('updated_at', ASCENDING)], expireAfterSeconds=interview_state_ttl())
+    ],
+    'question_bank': [
+        # add_questions upserts on this pair; count/pick filter on role_key
+        IndexModel([('role_key', ASCENDING), ('question_norm', ASCENDING)], unique=True)
+    ],
+    'question_bank_seen': [
+        # mark_question_seen upsert key
+        IndexModel([('user_id', ASCENDING), ('question_id', ASCENDING)], unique=True),
+        # get_seen_question_ids
+        IndexModel([('user_id', ASCENDING), ('role_key', ASCENDING)])
+    ],
+    'daily_active': [
+        # Only today's rows matter for deduplication; older ones are dropped after a few days
+        IndexModel([('date', ASCENDING)], expireAfterSeconds=3 * 24 * 3600)
+    ],
+    'llm_cache': [
+        # Mongo cache tier: expired entries are removed by the TTL monitor
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0)
+    ]
+}
+
+def _key(keys):
+    return tuple((field, direction) for field, direction in keys.items())
+
+def _declared(collection_name):
+    return {_key(model.document['key']): model for model in INDEXES.get(collection_name, [])}
+
+def _existing(collection_name):
+    return {_key(info['key']): info for info in mongo.db[collection_name].list_indexes()}
+
+def check_indexes(collection_names=None):
+    """Compare the registry with the database: {collection: {'missing': [...], 'conflicting': [...]}}
+
+    An index is conflicting when one with the same keys exists but its unique/TTL
+    options differ from the declaration; it is reported, never dropped.
+    """
+    result = {}
+    for name in collection_names or INDEXES:
+        existing = _existing(name)
+        missing, conflicting = [], []
+        for key, model in _declared(name).items():
+            info = existing.get(key)
+            if info is None:
+                missing.append(model.document['name'])
+                continue
+            for option in ('unique', 'expireAfterSeconds'):
+                if model.document.get(option) != info.get(option) and (model.document.get(option) or info.get(option)):
+                    conflicting.append(info['name'])
+                    break
+        result[name] = {'missing': missing, 'conflicting': conflicting}
+    return result
+
+def ensure_indexes(collection_names=None, log=print):
+    """Create every declared index that does not exist yet. Returns {collection: [created names]}."""
+    created = {}
+    for name in collection_names or INDEXES:
+        existing = _existing(name)
+        models = [model for key, model in _declared(name).items() if key not in existing]
+        if not models:
+            continue
+        try:
+            created[name] = mongo.db[name].create_indexes(models)
+        except OperationFailure as e:
+            # e.g. a unique index over data that already has duplicates
+            log(f"Index creation on {name} failed: {e}")
+            continue
+        log(f"Created indexes on {name}: {', '.join(created[name])}")
+    return created
+
+def index_usage_report(collection_names=None):
+    """Per collection: declared indexes that are missing, plus $indexStats usage of what exists.
+
+    'unused' lists existing indexes (other than _id_) with zero accesses since the
+    server started tracking them, and 'undeclared' those the registry does not know.
+    """
+    report = {}
+    for name in collection_names or INDEXES:
+        declared = _declared(name)
+        stats = list(mongo.db[name].aggregate([{'$indexStats': {}}]))
+        usage = {stat['name']: stat.get('accesses', {}).get('ops', 0) for stat in stats}
+        keys_by_name = {stat['name']: _key(stat['key']) for stat in stats}
+        report[name] = {
+            'missing': [model.document['name'] for key, model in declared.items() if key not in keys_by_name.values()],
+            'unused': sorted(n for n, ops in usage.items() if ops == 0 and n != '_id_'),
+            'undeclared': sorted(n for n, key in keys_by_name.items() if key not in declared and n != '_id_'),
+            'usage': usage
+        }
+    return report
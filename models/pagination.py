@@ -0,0 +1,124 @@
+from mongo_client import mongo
+from bson import ObjectId
+from datetime import datetime
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# BSON sort order for the value types a sort field holds in practice (null/missing first)
+_TYPE_RANKS = [
+    ('null', None),
+    ('number', ['double', 'int', 'long', 'decimal']),
+    ('string', ['string']),
+    ('date', ['date'])
+]
+
+class InvalidCursor(ValueError):
+    pass
+
+def _rank(value):
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        raise InvalidCursor('Unsupported cursor value')
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    raise InvalidCursor('Unsupported cursor value')
+
+def page_size(requested=None):
+    """Clamp a requested page size (e.g. ?limit=) to [1, MAX_PAGE_SIZE]"""
+    try:
+        size = int(requested) if requested not in (None, '') else DEFAULT_PAGE_SIZE
+    except (TypeError, ValueError):
+        size = DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+def encode_cursor(doc, sort_field='created_at'):
+    """Opaque continuation token for the position just after `doc`"""
+    value = doc.get(sort_field)
+    if isinstance(value, datetime):
+        payload = {'t': 'date', 'v': value.isoformat()}
+    else:
+        _rank(value)
+        payload = {'t': 'raw', 'v': value}
+    payload['id'] = str(doc['_id'])
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Return (sort value, last _id) from a token produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        value = datetime.fromisoformat(payload['v']) if payload['t'] == 'date' else payload['v']
+        _rank(value)
+        return value, ObjectId(payload['id'])
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor('Invalid pagination cursor')
+
+def _type_filter(sort_field, ranks):
+    clauses = []
+    for index in ranks:
+        bson_types = _TYPE_RANKS[index][1]
+        clauses.append({sort_field: None} if bson_types is None else {sort_field: {'$type': bson_types}})
+    return clauses
+
+def keyset_match(cursor, sort_field='created_at', direction=-1):
+    """Filter selecting documents that sort after `cursor` in (sort_field, _id) order"""
+    value, last_id = decode_cursor(cursor)
+    op = '$lt' if direction < 0 else '$gt'
+    clauses = [{sort_field: value, '_id': {op: last_id}}]
+    if value is not None:
+        clauses.append({sort_field: {op: value}})
+    # Documents whose sort value is of a type that sorts entirely after this one
+    rank = _rank(value)
+    later_ranks = range(rank) if direction < 0 else range(rank + 1, len(_TYPE_RANKS))
+    clauses.extend(_type_filter(sort_field, later_ranks))
+    return {'$or': clauses}
+
+def _combine(query, cursor, sort_field, direction):
+    if not cursor:
+        return query or {}
+    keyset = keyset_match(cursor, sort_field, direction)
+    return {'$and': [query, keyset]} if query else keyset
+
+def _split_page(docs, limit, sort_field):
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1], sort_field) if has_more and docs else None
+    return docs, next_cursor
+
+def paginate(collection_name, query=None, cursor=None, limit=None, projection=None,
+             sort_field='created_at', direction=-1):
+    """One page of find() results in (sort_field, _id) order. Returns (docs, next_cursor)."""
+    limit = page_size(limit)
+    if projection and sort_field not in projection and any(projection.values()):
+        # Inclusion projections must keep the sort field for the next cursor
+        projection = {**projection, sort_field: 1}
+    docs = list(
+        mongo.db[collection_name]
+        .find(_combine(query, cursor, sort_field, direction), projection)
+        .sort([(sort_field, direction), ('_id', direction)])
+        .limit(limit + 1)
+    )
+    return _split_page(docs, limit, sort_field)
+
+def paginate_aggregate(collection_name, pipeline=None, query=None, cursor=None, limit=None,
+                       sort_field='created_at', direction=-1):
+    """Keyset-paginate `query`, then run `pipeline` on just that page. Returns (docs, next_cursor)."""
+    limit = page_size(limit)
+    stages = [
+        {'$match': _combine(query, cursor, sort_field, direction)},
+        {'$sort': {sort_field: direction, '_id': direction}},
+        {'$limit': limit + 1}
+    ] + list(pipeline or [])
+    docs = list(mongo.db[collection_name].aggregate(stages))
+    return _split_page(docs, limit, sort_field)
@@ -0,0 +1,75 @@
+from mongo_client import mongo
+from pymongo import UpdateOne
+from datetime import datetime
+import re
+
+def normalize_role(role):
+    """Canonical pool key for a job role: 'Senior  Python-Developer!' -> 'senior python developer'"""
+    role = re.sub(r'[^a-z0-9+#]+', ' ', (role or '').lower())
+    return ' '.join(role.split())
+
+def _normalize_question(question):
+    return ' '.join(question.lower().split())
+
+def count_questions(role_key):
+    return mongo.db.question_bank.count_documents({'role_key': role_key})
+
+def add_questions(role, questions, source='llm'):
+    """Upsert questions into the pool for `role`; duplicates are ignored. Returns how many were new."""
+    role_key = normalize_role(role)
+    now = datetime.utcnow()
+    ops = []
+    for question in questions:
+        question = question.strip()
+        if not question:
+            continue
+        ops.append(UpdateOne(
+            {'role_key': role_key, 'question_norm': _normalize_question(question)},
+            {'$setOnInsert': {
+                'role_key': role_key,
+                'role': role,
+                'question': question,
+                'question_norm': _normalize_question(question),
+                'source': source,
+                'created_at': now
+            }},
+            upsert=True
+        ))
+    if not ops:
+        return 0
+    result = mongo.db.question_bank.bulk_write(ops, ordered=False)
+    return result.upserted_count
+
+def get_seen_question_ids(user_id, role_key):
+    return mongo.db.question_bank_seen.distinct('question_id', {'user_id': user_id, 'role_key': role_key})
+
+def pick_unseen_question(role_key, user_id=None, exclude_questions=None):
+    """Return a random pooled question the user has not been asked yet, or None"""
+    match = {'role_key': role_key}
+    if user_id:
+        seen_ids = get_seen_question_ids(user_id, role_key)
+        if seen_ids:
+            match['_id'] = {'$nin': seen_ids}
+    if exclude_questions:
+        match['question_norm'] = {'$nin': [_normalize_question(q) for q in exclude_questions]}
+    docs = list(mongo.db.question_bank.aggregate([
+        {'$match': match},
+        {'$sample': {'size': 1}},
+        {'$project': {'question': 1, 'role_key': 1}}
+    ]))
+    return docs[0] if docs else None
+
+def mark_question_seen(user_id, role_key, question_id):
+    return mongo.db.question_bank_seen.update_one(
+        {'user_id': user_id, 'question_id': question_id},
+        {'$set': {'role_key': role_key, 'seen_at': datetime.utcnow()}},
+        upsert=True
+    )
+
+def get_roles_below_watermark(watermark):
+    """Return [(role, count)] for every pooled role holding fewer than `watermark` questions"""
+    pipeline = [
+        {'$group': {'_id': '$role_key', 'role': {'$first': '$role'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$lt': watermark}}}
+    ]
+    return [(doc['role'], doc['count']) for doc in mongo.db.question_bank.aggregate(pipeline)]
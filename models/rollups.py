@@ -0,0 +1,145 @@
+from mongo_client import mongo
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+from models.analytics import date_stages, chart_buckets
+
+# rollup counter -> source collection it is derived from
+ROLLUP_SOURCES = {
+    'signups': 'users',
+    'sessions': 'session',
+    'feedback': 'feedback',
+    'suggestions': 'suggest_feedback'
+}
+
+def _day_start(when):
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _day_id(when):
+    return when.strftime('%Y-%m-%d')
+
+def _mark_active(when, user_id):
+    """Record `user_id` as active on `when`'s day; True only the first time that day.
+
+    One small daily_active document per (day, user) instead of a per-day array, so a
+    busy day never grows the rollup row.
+    """
+    try:
+        result = mongo.db.daily_active.update_one(
+            {'_id': f'{_day_id(when)}:{user_id}'},
+            {'$setOnInsert': {'date': _day_start(when), 'user_id': str(user_id)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent upsert for the same pair won the insert
+        return False
+    return result.upserted_id is not None
+
+def record_event(counter, when=None, user_id=None, amount=1):
+    """Bump today's (or `when`'s) rollup counter by `amount`; session events also count `user_id` active.
+
+    Rollups are derived data, so a failure here is logged and never fails the insert itself.
+    """
+    when = when or datetime.utcnow()
+    try:
+        increments = {counter: amount}
+        if user_id and _mark_active(when, user_id):
+            increments['active_users'] = 1
+        mongo.db.daily_rollups.update_one(
+            {'_id': _day_id(when)},
+            {'$inc': increments, '$setOnInsert': {'date': _day_start(when)}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"daily_rollups update failed for {counter}: {e}")
+
+def get_rollups(start, end):
+    """Rollup rows for days in [start, end), oldest first, with active_users as a count"""
+    return list(mongo.db.daily_rollups.aggregate([
+        {'$match': {'_id': {'$gte': _day_id(start), '$lt': _day_id(end)}}},
+        {'$sort': {'_id': 1}},
+        {'$project': {
+            'date': 1,
+            **{counter: {'$ifNull': [f'${counter}', 0]} for counter in ROLLUP_SOURCES},
+            # Rows written before daily_active existed carry an active_user_ids array
+            'active_users': {'$ifNull': ['$active_users', {'$size': {'$ifNull': ['$active_user_ids', []]}}]}
+        }}
+    ]))
+
+def sum_rollups(start, end):
+    """Totals of every counter over the days in [start, end)"""
+    totals = {counter: 0 for counter in ROLLUP_SOURCES}
+    for row in get_rollups(start, end):
+        for counter in ROLLUP_SOURCES:
+            totals[counter] += row.get(counter, 0)
+    return totals
+
+def get_today_rollup(now=None):
+    now = now or datetime.utcnow()
+    rows = get_rollups(_day_start(now), _day_start(now) + timedelta(days=1))
+    if rows:
+        return rows[0]
+    return {**{counter: 0 for counter in ROLLUP_SOURCES}, 'active_users': 0}
+
+def rollup_series(counter, start, end, bucket_of):
+    """{bucket: total} of `counter` for days in [start, end), bucketed by bucket_of(day datetime)"""
+    totals = {}
+    for row in get_rollups(start, end):
+        key = bucket_of(row['date'])
+        totals[key] = totals.get(key, 0) + row.get(counter, 0)
+    return totals
+
+# Python equivalents of the chart bucket keys in models.analytics.chart_buckets
+_CHART_BUCKET_OF = {
+    'week': lambda day: day.strftime('%Y-%m-%d'),
+    'month': lambda day: (day.day - 1) // 7 + 1,
+    'year': lambda day: day.month
+}
+
+def rollup_growth_series(counter, mode='week', now=None):
+    """Per-bucket counts for `mode` (week/month/year) as {labels, data}, read from O(days) rollup rows"""
+    now = now or datetime.utcnow()
+    plan = chart_buckets(mode, now)
+    if plan is None:
+        return {'labels': [], 'data': []}
+    start, end, _, keys, labels = plan
+    totals = rollup_series(counter, start, end, _CHART_BUCKET_OF[mode])
+    return {'labels': labels, 'data': [totals.get(k, 0) for k in keys]}
+
+def rebuild_rollups(since=None):
+    """Recompute daily_rollups from the raw collections (all history, or days from `since` on)"""
+    if since is not None:
+        since = _day_start(since)
+        mongo.db.daily_rollups.delete_many({'_id': {'$gte': _day_id(since)}})
+    else:
+        mongo.db.daily_rollups.delete_many({})
+    merge = {'$merge': {'into': 'daily_rollups', 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'insert'}}
+    day_id = {'$dateToString': {'format': '%Y-%m-%d', 'date': '$_date'}}
+    for counter, collection in ROLLUP_SOURCES.items():
+        pipeline = date_stages('created_at', start=since, legacy_strings=True) + [
+            {'$group': {'_id': day_id, counter: {'$sum': 1}}},
+            {'$addFields': {'date': {'$dateFromString': {'dateString': '$_id'}}}},
+            merge
+        ]
+        mongo.db[collection].aggregate(pipeline)
+    # Active users per day: distinct session owners, one daily_active row per (day, user)
+    # so record_event keeps deduplicating against them
+    owners = [{'$match': {'user_id': {'$nin': [None, '']}}}]
+    owners += date_stages('created_at', start=since, legacy_strings=True)
+    owners += [{'$group': {'_id': {'day': day_id, 'user_id': {'$toString': '$user_id'}}}}]
+    recent = _day_id(datetime.utcnow() - timedelta(days=2))
+    mongo.db.session.aggregate(owners + [
+        # Older pairs would only be removed again by the daily_active TTL
+        {'$match': {'_id.day': {'$gte': recent}}},
+        {'$project': {
+            '_id': {'$concat': ['$_id.day', ':', '$_id.user_id']},
+            'date': {'$dateFromString': {'dateString': '$_id.day'}},
+            'user_id': '$_id.user_id'
+        }},
+        {'$merge': {'into': 'daily_active', 'on': '_id', 'whenMatched': 'keepExisting', 'whenNotMatched': 'insert'}}
+    ])
+    mongo.db.session.aggregate(owners + [
+        {'$group': {'_id': '$_id.day', 'active_users': {'$sum': 1}}},
+        {'$addFields': {'date': {'$dateFromString': {'dateString': '$_id'}}}},
+        merge
+    ])
+    return mongo.db.daily_rollups.count_documents({} if since is None else {'_id': {'$gte': _day_id(since)}})
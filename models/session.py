@@ -1,6 +1,9 @@
 from mongo_client import mongo
 from bson import ObjectId
 from datetime import datetime, timedelta
+from models.rollups import record_event
+from models.pagination import paginate, paginate_aggregate
+from models.transcript import append_turns, replace_turns
 
 def create_session(session_data):
     # Auto-fill required fields with defaults if missing
@@ -13,12 +16,13 @@ def create_session(session_data):
     session_data.setdefault('total_time_minutes', 0)
     session_data.setdefault('scores', 0)  # Or [] if you want a list
     session_data.setdefault('summary', "")
-    # Ensure chats is an array of objects with required fields if provided, else empty array
-    if 'chats' not in session_data or not isinstance(session_data['chats'], list):
-        session_data['chats'] = []
+    # Chats are stored in transcript buckets, not on the session document
+    chats = session_data.pop('chats', None)
+    if not isinstance(chats, list):
+        chats = []
     else:
         # Fill each chat with required fields if missing
-        for chat in session_data['chats']:
+        for chat in chats:
             chat.setdefault('question', "")
             chat.setdefault('answer', "")
             chat.setdefault('ai_feedback', "")
@@ -26,22 +30,37 @@ def create_session(session_data):
             chat.setdefault('summary', "")
             chat.setdefault('created_at', now_iso)
             chat.setdefault('updated_at', now_iso)
+    session_data['chat_count'] = 0
     session_data['created_at'] = datetime.utcnow()
     session_data['updated_at'] = datetime.utcnow()
-    return mongo.db.session.insert_one(session_data)
+    result = mongo.db.session.insert_one(session_data)
+    if chats:
+        append_turns(session_data['session_id'], chats)
+    record_event('sessions', session_data['created_at'], user_id=session_data.get('user_id'))
+    return result
 
 def get_session_by_id(session_id):
-    return mongo.db.session.find_one({'session_id': session_id})
+    """Session metadata with chat_count; read turns with models.transcript.get_turns"""
+    return mongo.db.session.find_one({'session_id': session_id}, {'chats': 0})
 
 def get_sessions_by_user(user_id):
-    return list(mongo.db.session.find({'user_id': user_id}))
+    return list(mongo.db.session.find({'user_id': user_id}, {'chats': 0}))
+
+def get_sessions_page(cursor=None, limit=None, user_id=None):
+    """One page of sessions (newest first), optionally for one user. Returns (sessions, next_cursor)."""
+    query = {'user_id': user_id} if user_id is not None else {}
+    return paginate('session', query, cursor=cursor, limit=limit, projection={'chats': 0})
 
 def update_session(session_id, update_data):
+    chats = update_data.pop('chats', None)
     update_data['updated_at'] = datetime.utcnow()
-    return mongo.db.session.update_one({'session_id': session_id}, {'$set': update_data})
+    result = mongo.db.session.update_one({'session_id': session_id}, {'$set': update_data})
+    if isinstance(chats, list):
+        replace_turns(session_id, chats)
+    return result
 
 def add_chat_to_session(session_id, chat):
-    return mongo.db.session.update_one({'session_id': session_id}, {'$push': {'chats': chat}, '$set': {'updated_at': datetime.utcnow()}}) 
+    return append_turns(session_id, [chat])
 
 def get_all_sessions():
     return list(mongo.db.session.find()) 
@@ -54,4 +73,40 @@ def get_sessions_today():
             '$gte': datetime(today.year, today.month, today.day),
             '$lt': datetime(tomorrow.year, tomorrow.month, tomorrow.day)
         }
-    })) 
\ No newline at end of file
+    })) 
+
+def get_session_summaries(cursor=None, limit=None):
+    """One page of sessions (newest first) with chat counts; chat bodies never leave the server"""
+    return paginate_aggregate('session', pipeline=[
+        {'$project': {
+            'session_name': 1,
+            'user_id': 1,
+            'start_time': 1,
+            'created_at': 1,
+            'total_time_minutes': 1,
+            # Sessions not yet migrated to transcript buckets still embed a chats array
+            'chat_count': {'$ifNull': ['$chat_count', {'$cond': [{'$isArray': '$chats'}, {'$size': '$chats'}, 0]}]}
+        }}
+    ], cursor=cursor, limit=limit)
+
+def create_interview_state(role=''):
+    """Create server-side state for a stepwise interview and return its interview_id"""
+    interview_id = str(ObjectId())
+    mongo.db.interview_state.insert_one({
+        'interview_id': interview_id,
+        'role': role,
+        'questions': [],
+        'created_at': datetime.utcnow(),
+        'updated_at': datetime.utcnow()
+    })
+    return interview_id
+
+def get_interview_state(interview_id):
+    return mongo.db.interview_state.find_one({'interview_id': interview_id})
+
+def set_interview_question(interview_id, index, question, role=None):
+    """Record the question issued at step `index` (0-based) of an interview"""
+    update = {f'questions.{index}': question, 'updated_at': datetime.utcnow()}
+    if role:
+        update['role'] = role
+    return mongo.db.interview_state.update_one({'interview_id': interview_id}, {'$set': update})
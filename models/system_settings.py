@@ -1,11 +1,11 @@
 from mongo_client import mongo
 from bson import ObjectId
 from datetime import datetime
+from utils.settings_service import settings_service
 
 def get_setting(setting_key):
-    """Get a system setting by key"""
-    setting = mongo.db.system_settings.find_one({"setting_key": setting_key})
-    return setting.get("setting_value") if setting else None
+    """Get a system setting by key (from the in-process settings snapshot)"""
+    return settings_service.get(setting_key)
 
 def set_setting(setting_key, setting_value, category="general", description=""):
     """Set or update a system setting"""
@@ -22,7 +22,7 @@ def set_setting(setting_key, setting_value, category="general", description=""):
     
     if existing:
         # Update existing setting
-        return mongo.db.system_settings.update_one(
+        result = mongo.db.system_settings.update_one(
             {"setting_key": setting_key},
             {"$set": setting_data}
         )
@@ -30,7 +30,9 @@ def set_setting(setting_key, setting_value, category="general", description=""):
         # Create new setting
         setting_data["_id"] = ObjectId()
         setting_data["created_at"] = datetime.utcnow()
-        return mongo.db.system_settings.insert_one(setting_data)
+        result = mongo.db.system_settings.insert_one(setting_data)
+    settings_service.bump_version()
+    return result
 
 def get_settings_by_category(category):
     """Get all settings in a specific category"""
@@ -42,29 +44,58 @@ def get_all_settings():
 
 def delete_setting(setting_key):
     """Delete a system setting"""
-    return mongo.db.system_settings.delete_one({"setting_key": setting_key})
+    result = mongo.db.system_settings.delete_one({"setting_key": setting_key})
+    settings_service.bump_version()
+    return result
 
 def get_app_settings():
     """Get common application settings"""
-    settings = {}
-    all_settings = get_all_settings()
-    
-    for setting in all_settings:
-        settings[setting["setting_key"]] = setting["setting_value"]
-    
-    return settings
+    return settings_service.snapshot()['system']
 
 def is_maintenance_mode():
     """Check if maintenance mode is enabled"""
-    maintenance_setting = get_setting("maintenance_mode")
-    return maintenance_setting == "true"
+    return settings_service.get_str("maintenance_mode") == "true"
 
 def get_max_session_duration():
     """Get maximum session duration in minutes"""
-    duration = get_setting("max_session_duration")
-    return int(duration) if duration else 30
+    return settings_service.get_int("max_session_duration", 30) or 30
 
 def is_feedback_enabled():
-    """Check if feedback feature is enabled"""
-    feedback_setting = get_setting("feedback_enabled")
-    return feedback_setting != "false"  # Default to true if not set
+    """Check if feedback feature is enabled (system setting and admin feature toggle)"""
+    # Default to true if not set
+    return settings_service.get_str("feedback_enabled") != "false" and settings_service.feature_enabled('feedback')
+
+def get_ai_config():
+    """Admin AI settings: ai_model, temperature, response_length (empty dict if never saved)"""
+    return settings_service.ai_config()
+
+def save_ai_config(ai_model=None, response_length=None, temperature=None):
+    """Save the admin AI settings document; fields left as None keep their stored value"""
+    update = {'updated_at': datetime.utcnow()}
+    if ai_model is not None:
+        update['ai_model'] = ai_model
+    if response_length is not None:
+        update['response_length'] = response_length
+    if temperature is not None:
+        update['temperature'] = temperature
+    result = mongo.db.settings.update_one(
+        {'type': 'ai_config'},
+        {'$set': update},
+        upsert=True
+    )
+    settings_service.bump_version()
+    return result
+
+def get_feature_toggles():
+    return settings_service.snapshot()['feature_toggles']
+
+def save_feature_toggles(toggles):
+    """Save the admin feature toggles document"""
+    result = mongo.db.settings.update_one(
+        {'type': 'feature_toggles'},
+        {'$set': {**toggles, 'updated_at': datetime.utcnow()}},
+        upsert=True
+    )
+    settings_service.bump_version()
+    return result
+
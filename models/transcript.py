@@ -0,0 +1,128 @@
+from mongo_client import mongo
+from pymongo import ReturnDocument, UpdateOne
+from datetime import datetime
+import os
+
+# Interview turns (Q/A/feedback dicts) live in fixed-size buckets keyed by
+# (session_id, bucket) instead of one ever-growing session.chats array.
+# A migrated session carries a `chat_count` counter and no `chats` field.
+
+def bucket_size():
+    return max(1, int(os.getenv('TRANSCRIPT_BUCKET_SIZE', '50')))
+
+def _write_turns(session_id, start, turns, size):
+    """Push turns numbered from `start` into their buckets, one upsert per bucket touched"""
+    now = datetime.utcnow()
+    by_bucket = {}
+    for offset, turn in enumerate(turns):
+        index = start + offset
+        by_bucket.setdefault(index // size, []).append({**turn, 'turn': index})
+    ops = [
+        UpdateOne(
+            {'session_id': session_id, 'bucket': bucket},
+            {
+                # $sort keeps turn order even if concurrent appends land out of order
+                '$push': {'turns': {'$each': bucket_turns, '$sort': {'turn': 1}}},
+                '$inc': {'count': len(bucket_turns)},
+                '$set': {'updated_at': now},
+                '$setOnInsert': {'created_at': now}
+            },
+            upsert=True
+        )
+        for bucket, bucket_turns in by_bucket.items()
+    ]
+    if ops:
+        mongo.db.transcript_buckets.bulk_write(ops, ordered=True)
+
+def migrate_session(session_id):
+    """Move one session's embedded chats array into buckets. Returns False if there is no such session."""
+    session = mongo.db.session.find_one({'session_id': session_id}, {'chats': 1, 'chat_count': 1})
+    if not session:
+        return False
+    if 'chat_count' in session:
+        return True
+    turns = session.get('chats') if isinstance(session.get('chats'), list) else []
+    # Idempotent: a half-finished earlier run is discarded and rewritten
+    mongo.db.transcript_buckets.delete_many({'session_id': session_id})
+    _write_turns(session_id, 0, turns, bucket_size())
+    mongo.db.session.update_one(
+        {'_id': session['_id'], 'chat_count': {'$exists': False}},
+        {'$set': {'chat_count': len(turns)}, '$unset': {'chats': ''}}
+    )
+    return True
+
+def append_turns(session_id, turns):
+    """Append turns to a session transcript; touches only the session counter and the tail bucket(s).
+
+    Returns the index of the first appended turn, or None if the session does not exist.
+    """
+    turns = list(turns)
+    if not turns:
+        return None
+    for _ in range(2):
+        # Reserve turn numbers atomically, then write them into their buckets
+        session = mongo.db.session.find_one_and_update(
+            {'session_id': session_id, 'chat_count': {'$exists': True}},
+            {'$inc': {'chat_count': len(turns)}, '$set': {'updated_at': datetime.utcnow()}},
+            projection={'chat_count': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if session:
+            start = session['chat_count'] - len(turns)
+            _write_turns(session_id, start, turns, bucket_size())
+            return start
+        # Session still holds a legacy embedded array (or does not exist)
+        if not migrate_session(session_id):
+            return None
+    return None
+
+def get_turns(session_id, start=0, limit=50):
+    """Turns [start, start + limit) of a session, reading only the buckets that hold them"""
+    start = max(0, int(start))
+    limit = max(0, int(limit))
+    if limit == 0:
+        return []
+    size = bucket_size()
+    end = start + limit
+    buckets = mongo.db.transcript_buckets.find(
+        {'session_id': session_id, 'bucket': {'$gte': start // size, '$lte': (end - 1) // size}},
+        {'turns': 1}
+    ).sort('bucket', 1)
+    turns = []
+    for bucket in buckets:
+        turns.extend(t for t in bucket.get('turns', []) if start <= t.get('turn', -1) < end)
+    if not turns:
+        # Not migrated yet: slice the legacy array server-side instead of loading it whole
+        legacy = mongo.db.session.find_one(
+            {'session_id': session_id, 'chat_count': {'$exists': False}},
+            {'chats': {'$slice': [start, limit]}}
+        )
+        if legacy and isinstance(legacy.get('chats'), list):
+            return [{**turn, 'turn': start + i} for i, turn in enumerate(legacy['chats'])]
+    return turns
+
+def replace_turns(session_id, turns):
+    """Replace a session's whole transcript (used when a client PUTs the full chats list)"""
+    turns = list(turns)
+    result = mongo.db.session.update_one(
+        {'session_id': session_id},
+        {'$set': {'chat_count': len(turns), 'updated_at': datetime.utcnow()}, '$unset': {'chats': ''}}
+    )
+    if result.matched_count:
+        mongo.db.transcript_buckets.delete_many({'session_id': session_id})
+        _write_turns(session_id, 0, turns, bucket_size())
+    return result
+
+def delete_transcript(session_id):
+    return mongo.db.transcript_buckets.delete_many({'session_id': session_id})
+
+def migrate_all_sessions(batch_size=500, log=None):
+    """Migrate every session that still embeds a chats array. Returns the number migrated."""
+    migrated = 0
+    cursor = mongo.db.session.find({'chat_count': {'$exists': False}}, {'session_id': 1}).batch_size(batch_size)
+    for session in cursor:
+        if session.get('session_id') and migrate_session(session['session_id']):
+            migrated += 1
+            if log and migrated % batch_size == 0:
+                log(migrated)
+    return migrated
@@ -1,7 +1,16 @@
 from mongo_client import mongo
-from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
 from datetime import datetime, timedelta
+from models.rollups import record_event, get_today_rollup
+from models.pagination import paginate
+from utils.lru import LRUCache
+from utils.password_hasher import password_hasher, HashingBusy
+import copy
+import os
+
+# Short-lived per-process copies of user documents for authenticated requests.
+# Writes below invalidate locally; other workers catch up within USER_CACHE_TTL.
+_user_cache = LRUCache(int(os.getenv('USER_CACHE_SIZE', '1024')), float(os.getenv('USER_CACHE_TTL', '30')))
 
 def create_user(user_data):
     from bson import ObjectId
@@ -11,11 +20,13 @@ def create_user(user_data):
     user_doc['_id'] = ObjectId()  # Always generate a new ObjectId
     user_doc['name'] = user_data.get('name', '')
     user_doc['email'] = user_data['email']
-    user_doc['password'] = generate_password_hash(user_data['password'])
+    user_doc['password'] = password_hasher.hash(user_data['password'])
     user_doc['role'] = user_data.get('role', 'user')
     user_doc['status'] = user_data.get('status', 'unblocked')
     user_doc['created_at'] = datetime.utcnow()
-    return mongo.db.users.insert_one(user_doc)
+    result = mongo.db.users.insert_one(user_doc)
+    record_event('signups', user_doc['created_at'])
+    return result
 
 def get_user_by_email(email):
     return mongo.db.users.find_one({"email": email})
@@ -23,24 +34,68 @@ def get_user_by_email(email):
 def get_user_by_id(user_id):
     return mongo.db.users.find_one({"_id": ObjectId(user_id)})
 
+def get_user_cached(user_id):
+    """get_user_by_id through the short-TTL user cache; returns a copy callers may modify"""
+    key = str(user_id)
+    user = _user_cache.get(key)
+    if user is None:
+        user = get_user_by_id(user_id)
+        if user is None:
+            return None
+        _user_cache.set(key, user)
+    return copy.deepcopy(user)
+
+def invalidate_user(user_id):
+    _user_cache.delete(str(user_id))
+
 def update_user_profile(user_id, update_data):
-    return mongo.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
+    result = mongo.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {**update_data, "updated_at": datetime.utcnow()}})
+    invalidate_user(user_id)
+    return result
 
 def check_password(user, password):
-    return check_password_hash(user['password'], password)
+    """Verify on the hashing pool; raises HashingBusy when the pool is saturated.
+
+    A correct password whose hash predates the current PASSWORD_HASH_METHOD is
+    rehashed in place, so tuning the cost takes effect as users log in.
+    """
+    if not password_hasher.verify(user['password'], password):
+        return False
+    try:
+        if not password_hasher.needs_rehash(user['password']):
+            return True
+        new_hash = password_hasher.hash(password)
+    except HashingBusy:
+        # Only an upgrade; try again on the next login
+        return True
+    # Guarded on the old hash so a concurrent password change is not overwritten
+    mongo.db.users.update_one(
+        {"_id": user['_id'], "password": user['password']},
+        {"$set": {"password": new_hash}}
+    )
+    invalidate_user(user['_id'])
+    return True
 
 def get_all_users():
     return list(mongo.db.users.find())
 
+def get_users_page(cursor=None, limit=None):
+    """One page of users (newest first) without password hashes. Returns (users, next_cursor)."""
+    return paginate('users', cursor=cursor, limit=limit, projection={'password': 0})
+
 def delete_user(user_id):
-    return mongo.db.users.delete_one({"_id": ObjectId(user_id)})
+    result = mongo.db.users.delete_one({"_id": ObjectId(user_id)})
+    invalidate_user(user_id)
+    return result
 
 def set_user_as_admin(user_id):
     """Set a user as admin"""
-    return mongo.db.users.update_one(
+    result = mongo.db.users.update_one(
         {"_id": ObjectId(user_id)}, 
-        {"$set": {"role": "admin"}}
+        {"$set": {"role": "admin", "updated_at": datetime.utcnow()}}
     )
+    invalidate_user(user_id)
+    return result
 
 def is_admin(user_id):
     """Check if user is admin"""
@@ -49,41 +104,51 @@ def is_admin(user_id):
 
 def update_user_password(user_id, new_password):
     """Update user password"""
-    hashed_password = generate_password_hash(new_password)
-    return mongo.db.users.update_one(
+    hashed_password = password_hasher.hash(new_password)
+    result = mongo.db.users.update_one(
         {"_id": ObjectId(user_id)}, 
-        {"$set": {"password": hashed_password}}
+        {"$set": {"password": hashed_password, "updated_at": datetime.utcnow()}}
     )
+    invalidate_user(user_id)
+    return result
 
 def block_user(user_id):
     """Block a user"""
-    return mongo.db.users.update_one(
+    result = mongo.db.users.update_one(
         {"_id": ObjectId(user_id)}, 
-        {"$set": {"status": "blocked", "blocked_at": datetime.utcnow()}}
+        {"$set": {"status": "blocked", "blocked_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
     )
+    invalidate_user(user_id)
+    return result
 
 def unblock_user(user_id):
     """Unblock a user"""
-    return mongo.db.users.update_one(
+    result = mongo.db.users.update_one(
         {"_id": ObjectId(user_id)}, 
-        {"$unset": {"status": "", "blocked_at": ""}}
+        {"$unset": {"status": "", "blocked_at": ""}, "$set": {"updated_at": datetime.utcnow()}}
     )
+    invalidate_user(user_id)
+    return result
 
 def remove_admin_role(user_id):
     """Remove admin role from user"""
-    return mongo.db.users.update_one(
+    result = mongo.db.users.update_one(
         {"_id": ObjectId(user_id)}, 
-        {"$set": {"role": "user"}}
+        {"$set": {"role": "user", "updated_at": datetime.utcnow()}}
     )
+    invalidate_user(user_id)
+    return result
 
 def reset_user_password(user_id):
     """Reset user password to default"""
     default_password = "password123"  # You can change this default
-    hashed_password = generate_password_hash(default_password)
-    return mongo.db.users.update_one(
+    hashed_password = password_hasher.hash(default_password)
+    result = mongo.db.users.update_one(
         {"_id": ObjectId(user_id)}, 
-        {"$set": {"password": hashed_password}}
+        {"$set": {"password": hashed_password, "updated_at": datetime.utcnow()}}
     )
+    invalidate_user(user_id)
+    return result
 
 def get_user_stats(user_id):
     """Get user statistics"""
@@ -144,20 +209,7 @@ def get_admin_users_today():
     })) 
 
 def get_daily_vs_nonfrequent_users():
-    from datetime import datetime, timedelta
-    today = datetime.utcnow().date()
-    tomorrow = today + timedelta(days=1)
-    # Get all users
-    all_users = list(mongo.db.users.find())
-    user_ids = [u['_id'] for u in all_users]
-    # Get users with a session today
-    sessions_today = mongo.db.session.distinct('user_id', {
-        'created_at': {
-            '$gte': datetime(today.year, today.month, today.day),
-            '$lt': datetime(tomorrow.year, tomorrow.month, tomorrow.day)
-        }
-    })
-    daily_user_ids = set(sessions_today)
-    daily_count = len(daily_user_ids)
-    non_frequent_count = len([uid for uid in user_ids if uid not in daily_user_ids])
-    return {'daily': daily_count, 'non_frequent': non_frequent_count} 
\ No newline at end of file
+    # Users with a session today come from the daily rollup instead of a distinct over sessions
+    daily_count = get_today_rollup()['active_users']
+    non_frequent_count = max(mongo.db.users.count_documents({}) - daily_count, 0)
+    return {'daily': daily_count, 'non_frequent': non_frequent_count}
\ No newline at end of file
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Question bank refill job for SkillSpeak AI
+Tops up the pre-generated interview question pools so live requests never wait on the LLM.
+Run it from cron / a scheduler, e.g.:  python refill_question_bank.py --role "Data Analyst"
+"""
+
+import argparse
+
+from app import app  # binds mongo to the configured database
+from utils.question_bank import refill_role, refill_low_roles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refill the interview question bank')
+    parser.add_argument('--role', action='append', default=[],
+                        help='Job role to refill (repeatable). Defaults to every pooled role below the watermark.')
+    parser.add_argument('--target', type=int, default=None,
+                        help='Pool size to refill each role up to')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.role:
+            added = {role: refill_role(role, args.target) for role in args.role}
+        else:
+            added = refill_low_roles(args.target)
+
+    if not added:
+        print("✅ All question pools are above the watermark.")
+    for role, count in added.items():
+        print(f"{role:30} : +{count} questions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Backup restore for SkillSpeak AI
+Replays the latest full backup plus every later incremental segment listed in
+backups/manifest.json (see POST /api/admin/backup) into the configured database.
+  python restore_backup.py --drop                 # rebuild every collection from scratch
+  python restore_backup.py --until <segment file> # point-in-time restore
+"""
+
+import argparse
+
+from app import app  # binds mongo to the configured database
+from utils.backup import restore_backup, restore_plan, load_manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Restore the database from NDJSON backup segments')
+    parser.add_argument('--dir', default=None, help='Backup directory (default: BACKUP_DIR or ./backups)')
+    parser.add_argument('--until', default=None, help='Stop after this segment file')
+    parser.add_argument('--collection', action='append', dest='collections',
+                        help='Only restore this collection (repeatable); default restores all')
+    parser.add_argument('--drop', action='store_true',
+                        help='Empty each collection before replaying its full dump (otherwise upsert by _id)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Documents per bulk write')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the segments that would be replayed')
+    args = parser.parse_args()
+
+    if args.dry_run:
+        for segment, collections in restore_plan(load_manifest(args.dir), args.until):
+            print(f"📦 {segment['file']} ({segment['mode']}): {', '.join(collections)}")
+        return
+
+    with app.app_context():
+        print("♻️  Restoring backup...")
+        totals = restore_backup(
+            backup_dir=args.dir,
+            until=args.until,
+            drop=args.drop,
+            collections=args.collections,
+            batch_size=args.batch_size,
+            log=lambda line: print(f"📦 {line}")
+        )
+    for name, count in totals.items():
+        print(f"✅ {name}: {count} documents applied")
+
+
+if __name__ == "__main__":
+    main()
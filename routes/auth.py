@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, session, g
-from models.user import create_user, get_user_by_email, check_password, get_user_by_id
-from utils.jwt_utils import encode_auth_token, token_required
+from models.user import create_user, get_user_by_email, check_password
+from utils.jwt_utils import encode_auth_token, token_required, current_user
+from utils.password_hasher import HashingBusy
 
 auth_bp = Blueprint('auth', __name__)
 user_bp = Blueprint('user', __name__)
@@ -17,6 +18,9 @@ def signup():
             return jsonify({'error': 'User already exists'}), 400
         user_id = create_user(data)
         return jsonify({'message': 'User created successfully', 'user_id': str(user_id.inserted_id)}), 201
+    except HashingBusy:
+        # Shed load fast instead of queueing behind the hashing pool
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -39,6 +43,8 @@ def login():
                 'email': user['email']
             }
         })
+    except HashingBusy:
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -56,7 +62,7 @@ def me():
 @user_bp.route('/me', methods=['GET'])
 @token_required
 def get_current_user():
-    user = get_user_by_id(g.user_id)
+    user = current_user()
     if user:
         return jsonify({
             'name': user.get('name', ''),
@@ -1,12 +1,11 @@
 from flask import Blueprint, jsonify, g, request
 from utils.jwt_utils import token_required
-from models.session import get_sessions_by_user, get_all_sessions, get_sessions_today
+from models.session import get_sessions_by_user
 from models.feedback import get_feedback_by_user
-from models.user import get_all_users, get_users_today, get_all_admin_users, get_admin_users_today
+from models.rollups import get_today_rollup
+from models.analytics import get_admin_counts, user_growth_series, users_with_positive_streak, users_with_recent_daily_sessions, users_with_consecutive_day_sessions, users_active_today
 from mongo_client import mongo
 from datetime import datetime, timedelta
-from collections import Counter
-from collections import defaultdict
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -28,190 +27,45 @@ def user_stats():
 
 @dashboard_bp.route('/admin_stats', methods=['GET'])
 def admin_stats():
-    total_sessions = get_all_sessions()
-    today_sessions = get_sessions_today()
-    total_users = get_all_users()
-    today_users = get_users_today()
-    admin_users = get_all_admin_users()
-    today_admins = get_admin_users_today()
-    total_suggest_feedback = mongo.db.suggest_feedback.count_documents({})
-    today = datetime.utcnow().date()
-    tomorrow = today + timedelta(days=1)
-    total_suggest_feedback_today = mongo.db.suggest_feedback.count_documents({
-        'created_at': {
-            '$gte': datetime(today.year, today.month, today.day),
-            '$lt': datetime(tomorrow.year, tomorrow.month, tomorrow.day)
-        }
-    })
+    # Totals in one $unionWith round-trip (a $match/$count branch per count), today's counts from the daily rollup row
+    counts = get_admin_counts()
+    today_rollup = get_today_rollup()
     return jsonify({
-        'total_chats': len(total_sessions),
-        'today_chats': len(today_sessions),
-        'total_users': len(total_users),
-        'today_users': len(today_users),
-        'admin_users': len(admin_users),
-        'today_admins': len(today_admins),
-        'total_suggest_feedback': total_suggest_feedback,
-        'total_suggest_feedback_today': total_suggest_feedback_today
+        'total_chats': counts['total_chats'],
+        'today_chats': today_rollup['sessions'],
+        'total_users': counts['total_users'],
+        'today_users': today_rollup['signups'],
+        'admin_users': counts['admin_users'],
+        'today_admins': counts['today_admins'],
+        'total_suggest_feedback': counts['total_suggest_feedback'],
+        'total_suggest_feedback_today': today_rollup['suggestions']
     })
 
 @dashboard_bp.route('/admin_user_growth', methods=['GET'])
 def admin_user_growth():
     mode = request.args.get('mode', 'week')
-    users = mongo.db.users.find()
-    now = datetime.utcnow()
-    data = []
-    if mode == 'week':
-        # Last 7 days, group by day
-        days = [(now.date() - timedelta(days=i)) for i in range(6, -1, -1)]
-        day_labels = [d.strftime('%a') for d in days]
-        counts = Counter()
-        for user in users:
-            if 'created_at' in user:
-                dt = user['created_at']
-                if isinstance(dt, str):
-                    dt = datetime.fromisoformat(dt.replace('Z', ''))
-                day = dt.date()
-                if day in days:
-                    counts[day] += 1
-        data = [counts[d] for d in days]
-        return {'labels': day_labels, 'data': data}
-    elif mode == 'month':
-        # Current month, group by week (1-4)
-        first = now.replace(day=1)
-        weeks = [1, 2, 3, 4]
-        week_labels = [f'Week {w}' for w in weeks]
-        counts = Counter()
-        for user in users:
-            if 'created_at' in user:
-                dt = user['created_at']
-                if isinstance(dt, str):
-                    dt = datetime.fromisoformat(dt.replace('Z', ''))
-                if dt.year == now.year and dt.month == now.month:
-                    week = (dt.day - 1) // 7 + 1
-                    if week in weeks:
-                        counts[week] += 1
-        data = [counts[w] for w in weeks]
-        return {'labels': week_labels, 'data': data}
-    elif mode == 'year':
-        # Current year, group by month
-        months = list(range(1, 13))
-        month_labels = [datetime(now.year, m, 1).strftime('%b') for m in months]
-        counts = Counter()
-        for user in users:
-            if 'created_at' in user:
-                dt = user['created_at']
-                if isinstance(dt, str):
-                    dt = datetime.fromisoformat(dt.replace('Z', ''))
-                if dt.year == now.year:
-                    counts[dt.month] += 1
-        data = [counts[m] for m in months]
-        return {'labels': month_labels, 'data': data}
-    else:
-        return {'labels': [], 'data': []}
+    return user_growth_series(mode)
 
 @dashboard_bp.route('/admin_user_streak_stats', methods=['GET'])
 def admin_user_streak_stats():
-    users = list(mongo.db.users.find())
-    daily = 0
-    non_daily = 0
-    for user in users:
-        streak = user.get('streak', 0)
-        if isinstance(streak, (int, float)) and streak > 0:
-            daily += 1
-        else:
-            non_daily += 1
+    daily, non_daily = users_with_positive_streak()
     return {'daily': daily, 'non_daily': non_daily}
 
 @dashboard_bp.route('/admin_user_streaks', methods=['GET'])
 def admin_user_streaks():
-    users = list(mongo.db.users.find())
-    sessions = list(mongo.db.session.find())
-    from datetime import datetime, timedelta
-    now = datetime.utcnow().date()
-    streak_days = 3  # Define streak as having a session for each of the last 3 days
-    user_sessions = {}
-    for s in sessions:
-        uid = s.get('user_id')
-        if not uid:
-            continue
-        dt = s.get('created_at')
-        if isinstance(dt, str):
-            try:
-                dt = datetime.fromisoformat(dt.replace('Z', ''))
-            except Exception:
-                continue
-        if not isinstance(dt, datetime):
-            continue
-        user_sessions.setdefault(str(uid), set()).add(dt.date())
-    daily = 0
-    non_daily = 0
-    for u in users:
-        uid = str(u['_id'])
-        streak = True
-        for i in range(streak_days):
-            if (now - timedelta(days=i)) not in user_sessions.get(uid, set()):
-                streak = False
-                break
-        if streak:
-            daily += 1
-        else:
-            non_daily += 1
+    # Streak = a session on each of the last 3 days
+    daily, non_daily = users_with_recent_daily_sessions(streak_days=3)
     return {'labels': ['Daily User', 'Non-Frequent User'], 'data': [daily, non_daily]}
 
 @dashboard_bp.route('/admin_user_activity', methods=['GET'])
 def admin_user_activity():
-    today = datetime.utcnow().date()
-    daily_users = 0
-    non_daily_users = 0
-    for user in mongo.db.users.find():
-        last_login = user.get('last_login') or user.get('created_at')
-        if last_login:
-            if isinstance(last_login, str):
-                try:
-                    last_login = datetime.fromisoformat(last_login.replace('Z', ''))
-                except Exception:
-                    continue
-            if last_login.date() == today:
-                daily_users += 1
-            else:
-                non_daily_users += 1
+    daily_users, non_daily_users = users_active_today()
     return {'daily_users': daily_users, 'non_daily_users': non_daily_users}
 
 @dashboard_bp.route('/admin_user_streak', methods=['GET'])
 def admin_user_streak():
-    # Get all sessions, group by user
-    from datetime import timedelta
-    sessions = list(mongo.db.session.find())
-    user_dates = defaultdict(set)
-    for s in sessions:
-        user = s.get('user_id')
-        dt = s.get('created_at')
-        if user and dt:
-            if isinstance(dt, str):
-                try:
-                    dt = datetime.fromisoformat(dt.replace('Z', ''))
-                except:
-                    continue
-            user_dates[user].add(dt.date())
-    daily_users = 0
-    non_daily_users = 0
-    for dates in user_dates.values():
-        if len(dates) < 2:
-            non_daily_users += 1
-            continue
-        sorted_dates = sorted(dates)
-        streak = 1
-        max_streak = 1
-        for i in range(1, len(sorted_dates)):
-            if (sorted_dates[i] - sorted_dates[i-1]) == timedelta(days=1):
-                streak += 1
-                max_streak = max(max_streak, streak)
-            else:
-                streak = 1
-        if max_streak >= 2:
-            daily_users += 1
-        else:
-            non_daily_users += 1
+    # Users with sessions on at least two consecutive days
+    daily_users, non_daily_users = users_with_consecutive_day_sessions()
     return {'daily_users': daily_users, 'non_daily_users': non_daily_users}
 
 @dashboard_bp.route('/admin_recent_activity', methods=['GET'])
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from models.feedback import create_feedback, get_feedback_by_user, get_feedback_by_id, update_feedback, delete_feedback, get_all_feedback, create_suggest_feedback, get_suggest_feedback_by_user, get_all_suggest_feedback, update_suggest_feedback_status, delete_suggest_feedback
+from models.feedback import create_feedback, queue_feedback, get_feedback_by_id, update_feedback, delete_feedback, get_feedback_page, create_suggest_feedback, get_suggest_feedback_page, update_suggest_feedback_status, delete_suggest_feedback
+from models.pagination import InvalidCursor
 from utils.ai_utils import get_ai_feedback
 import json
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -81,16 +82,23 @@ def generate_feedback():
 def list_user_feedback(user_id):
     """Get feedback for a specific user"""
     try:
-        feedbacks = get_feedback_by_user(user_id)
-        return jsonify([f for f in feedbacks]), 200
+        feedbacks, next_cursor = get_feedback_page(request.args.get('cursor'), request.args.get('limit'), user_id=user_id)
+        return jsonify({'feedback': feedbacks, 'next_cursor': next_cursor}), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @feedback_bp.route('/list', methods=['GET'])
 def list_current_user_feedback():
     user_id = request.args.get('user_id', 'anonymous')
-    feedbacks = get_feedback_by_user(user_id)
-    return jsonify({'feedback': feedbacks}), 200
+    try:
+        feedbacks, next_cursor = get_feedback_page(request.args.get('cursor'), request.args.get('limit'), user_id=user_id)
+        return jsonify({'feedback': feedbacks, 'next_cursor': next_cursor}), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @feedback_bp.route('/<feedback_id>', methods=['GET'])
 def get_feedback(feedback_id):
@@ -126,8 +134,10 @@ def delete_feedback_route(feedback_id):
 def get_all_feedback_admin():
     """Get all feedback for admin panel"""
     try:
-        feedbacks = get_all_feedback()
-        return jsonify([f for f in feedbacks]), 200
+        feedbacks, next_cursor = get_feedback_page(request.args.get('cursor'), request.args.get('limit'))
+        return jsonify({'feedback': feedbacks, 'next_cursor': next_cursor}), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -135,9 +145,10 @@ def get_all_feedback_admin():
 def get_pending_feedback():
     """Get pending feedback for admin review"""
     try:
-        feedbacks = get_all_feedback()
-        pending_feedbacks = [f for f in feedbacks if f.get('status') == 'pending']
-        return jsonify(pending_feedbacks), 200
+        feedbacks, next_cursor = get_feedback_page(request.args.get('cursor'), request.args.get('limit'), status='pending')
+        return jsonify({'feedback': feedbacks, 'next_cursor': next_cursor}), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500 
 
@@ -148,23 +159,24 @@ def save_ai_feedback():
     feedbacks = data.get('feedbacks', [])
     summary = data.get('summary', '')
     # Save feedbacks as type 'ai_feedback'
-    for fb in feedbacks:
-        create_feedback({
-            'user_id': user_id,
-            'input': '',
-            'type': 'ai_feedback',
-            'status': 'completed',
-            'ai_feedback': fb
-        })
+    items = [{
+        'user_id': user_id,
+        'input': '',
+        'type': 'ai_feedback',
+        'status': 'completed',
+        'ai_feedback': fb
+    } for fb in feedbacks]
     # Save summary as type 'improvement'
     if summary:
-        create_feedback({
+        items.append({
             'user_id': user_id,
             'input': '',
             'type': 'improvement',
             'status': 'completed',
             'improvement': summary
         })
+    # Buffered: coalesced with other requests into one insert_many
+    queue_feedback(items)
     return jsonify({'message': 'AI feedback and improvement saved'}), 201 
 
 # --- SUGGESTED FEEDBACK ENDPOINTS ---
@@ -190,20 +202,20 @@ def add_suggest_feedback():
 @feedback_bp.route('/suggest/all', methods=['GET'])
 def get_all_suggest_feedback_route():
     try:
-        feedbacks = get_all_suggest_feedback()
-        for fb in feedbacks:
-            fb['_id'] = str(fb['_id'])
-        return jsonify({'suggest_feedback': feedbacks}), 200
+        feedbacks, next_cursor = get_suggest_feedback_page(request.args.get('cursor'), request.args.get('limit'))
+        return jsonify({'suggest_feedback': feedbacks, 'next_cursor': next_cursor}), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @feedback_bp.route('/suggest/user/<user_id>', methods=['GET'])
 def get_user_suggest_feedback(user_id):
     try:
-        feedbacks = get_suggest_feedback_by_user(user_id)
-        for fb in feedbacks:
-            fb['_id'] = str(fb['_id'])
-        return jsonify({'suggest_feedback': feedbacks}), 200
+        feedbacks, next_cursor = get_suggest_feedback_page(request.args.get('cursor'), request.args.get('limit'), user_id=user_id)
+        return jsonify({'suggest_feedback': feedbacks, 'next_cursor': next_cursor}), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,17 +1,17 @@
 from flask import Blueprint, request, jsonify, g
-from utils.jwt_utils import token_required
-from models.user import get_user_by_id, update_user_profile
+from utils.jwt_utils import token_required, current_user
+from models.user import update_user_profile
+from utils.password_hasher import HashingBusy
 
 profile_bp = Blueprint('profile', __name__)
 
 @profile_bp.route('/me', methods=['GET'])
 @token_required
 def get_profile():
-    user = get_user_by_id(g.user_id)
+    user = current_user()
     if not user:
         return jsonify({'error': 'User not found'}), 404
     user.pop('password', None)
-    user['_id'] = str(user['_id'])
     return jsonify(user)
 
 @profile_bp.route('/me', methods=['PUT'])
@@ -34,19 +34,20 @@ def change_password():
             return jsonify({'error': 'Current and new password are required'}), 400
         
         # Get user and verify current password
-        from models.user import get_user_by_id, update_user_password
-        from werkzeug.security import check_password_hash
+        from models.user import get_user_by_id, update_user_password, check_password
         
         user = get_user_by_id(g.user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        if not check_password_hash(user['password'], current_password):
+        if not check_password(user, current_password):
             return jsonify({'error': 'Current password is incorrect'}), 400
         
         # Update password
         update_user_password(g.user_id, new_password)
         
         return jsonify({'message': 'Password changed successfully'}), 200
+    except HashingBusy:
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500 
\ No newline at end of file
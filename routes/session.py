@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
-from models.session import create_session, get_session_by_id, get_sessions_by_user, update_session, add_chat_to_session
+from models.session import create_session, get_session_by_id, get_sessions_page, update_session, add_chat_to_session
+from models.transcript import get_turns
+from models.pagination import InvalidCursor, page_size
 
 session_bp = Blueprint('session', __name__)
 
@@ -22,8 +24,11 @@ def get_session(session_id):
 @session_bp.route('/user/<user_id>', methods=['GET'])
 def get_sessions_for_user(user_id):
     print("Fetching sessions for user_id:", repr(user_id))
-    sessions = get_sessions_by_user(user_id)
-    return jsonify(sessions), 200
+    try:
+        sessions, next_cursor = get_sessions_page(request.args.get('cursor'), request.args.get('limit'), user_id=user_id)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'sessions': sessions, 'next_cursor': next_cursor}), 200
 
 @session_bp.route('/<session_id>', methods=['PUT'])
 def update_session_route(session_id):
@@ -34,5 +39,18 @@ def update_session_route(session_id):
 @session_bp.route('/<session_id>/add_chat', methods=['POST'])
 def add_chat(session_id):
     chat = request.json
-    add_chat_to_session(session_id, chat)
-    return jsonify({'message': 'Chat added to session'}), 200 
\ No newline at end of file
+    if add_chat_to_session(session_id, chat) is None:
+        return jsonify({'error': 'Session not found'}), 404
+    return jsonify({'message': 'Chat added to session'}), 200
+
+@session_bp.route('/<session_id>/chats', methods=['GET'])
+def get_session_chats(session_id):
+    """A range of transcript turns: ?start= (turn index, default 0) and ?limit="""
+    try:
+        start = int(request.args.get('start', 0))
+    except ValueError:
+        return jsonify({'error': 'start must be an integer'}), 400
+    limit = page_size(request.args.get('limit'))
+    chats = get_turns(session_id, start, limit)
+    next_start = start + limit if len(chats) == limit else None
+    return jsonify({'chats': chats, 'next_start': next_start}), 200 
\ No newline at end of file
@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify, g
-from utils.ai_utils import get_ai_response
-from models.chat import save_message, get_chat_history
-from models.session import get_sessions_by_user
+from flask import Blueprint, request, jsonify, g, Response, stream_with_context
+from utils.ai_utils import get_ai_response, stream_ai_response
+from utils.llm_gateway import ai_response_async, run_async
+from utils.question_bank import get_question as get_bank_question
+from models.chat import queue_message, get_chat_history_page
+from models.pagination import InvalidCursor
+from models.session import get_sessions_by_user, create_interview_state, get_interview_state, set_interview_question
 from utils.jwt_utils import token_required
 import re
+import json
+import asyncio
 from datetime import datetime
 
 voice_bp = Blueprint('voice', __name__)
@@ -12,26 +17,54 @@ voice_bp = Blueprint('voice', __name__)
 def get_welcome_prompt():
     return "Welcome to the AI Interviewer. Please tell me your job role."
 
+def _question_prompt(role):
+    return f"Generate one clear interview question for a candidate applying for a {role} role. Only return the question."
+
+def _parse_question(response):
+    return response.strip().replace('\n', ' ')
+
 def ask_question(role):
-    prompt = f"Generate one clear interview question for a candidate applying for a {role} role. Only return the question."
-    response = get_ai_response(prompt)
-    question = response.strip().replace('\n', ' ')
-    return question
+    # Never from the shared response cache: every candidate for a role would get the same question
+    return _parse_question(get_ai_response(_question_prompt(role), use_cache=False))
 
-def evaluate_answer(question, answer):
-    prompt = (
+def next_question(role, user_id=None, exclude=None):
+    """Serve a question from the pre-generated bank, generating live only when the pool is empty."""
+    try:
+        question = get_bank_question(role, user_id=user_id, exclude=exclude)
+    except Exception as e:
+        print('Question bank unavailable:', e)
+        question = None
+    return question or ask_question(role)
+
+def _evaluation_prompt(question, answer):
+    return (
         f"Evaluate the following answer to an interview question on a scale of 1 to 10. "
         f"Also provide brief constructive feedback.\n\n"
         f"Question: {question}\nAnswer: {answer}\n\n"
         f"Respond in this format: Score: X/10\nFeedback: <your feedback>"
     )
-    content = get_ai_response(prompt).strip()
+
+def _parse_evaluation(content):
+    content = content.strip()
     score_match = re.search(r'Score:\s*(\d+)/10', content)
     feedback_match = re.search(r'Feedback:\s*(.*)', content)
     score = int(score_match.group(1)) if score_match else 0
     feedback = feedback_match.group(1).strip() if feedback_match else "No feedback found."
     return score, feedback
 
+def evaluate_answer(question, answer):
+    return _parse_evaluation(get_ai_response(_evaluation_prompt(question, answer)))
+
+async def _evaluate_answers_async(role, answers, questions):
+    """Evaluate every answer concurrently against the question that was actually asked."""
+    async def evaluate_one(index, answer):
+        question = questions[index] if index < len(questions) else None
+        if not question:
+            # Clients without an interview_id: no record of the question, generate one.
+            question = _parse_question(await ai_response_async(_question_prompt(role), use_cache=False))
+        return _parse_evaluation(await ai_response_async(_evaluation_prompt(question, answer)))
+    return await asyncio.gather(*(evaluate_one(i, answer) for i, answer in enumerate(answers)))
+
 def final_feedback(scores):
     avg = sum(scores) / len(scores) if scores else 0
     if avg >= 8:
@@ -53,18 +86,18 @@ def send_message():
     if not user_id or not role or not message:
         print('Missing required fields:', data)
         return jsonify({'error': 'user_id, role, and message required'}), 400
-    save_message(
+    queue_message(
         user_id=user_id,
         role=role,
         message=message,
         session_id=session_id,
         chat_id=chat_id
     )
-    # Get AI response from configured AI provider (Groq)
-    ai_response = get_ai_response(message)
+    # Get AI response from configured AI provider (Groq); chat replies are not cached
+    ai_response = get_ai_response(message, use_cache=False)
     if ai_response.startswith('AI error:') or ai_response.startswith('AI HTTP error:') or ai_response.startswith('AI network error:'):
         return jsonify({'error': ai_response}), 502
-    save_message(
+    queue_message(
         user_id=user_id,
         role='ai',
         message=ai_response,
@@ -74,12 +107,67 @@ def send_message():
     print('Saved user and AI messages for user_id:', user_id)
     return jsonify({'message': ai_response}), 201
 
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ''
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@voice_bp.route('/chat/send/stream', methods=['POST'])
+def send_message_stream():
+    """Same as /chat/send, but streams the AI reply as Server-Sent Events while it is generated."""
+    data = request.json or {}
+    user_id = data.get('user_id')
+    role = data.get('role')
+    message = data.get('message')
+    session_id = data.get('session_id')
+    chat_id = data.get('chat_id')
+    if not user_id or not role or not message:
+        return jsonify({'error': 'user_id, role, and message required'}), 400
+    queue_message(
+        user_id=user_id,
+        role=role,
+        message=message,
+        session_id=session_id,
+        chat_id=chat_id
+    )
+    try:
+        tokens = stream_ai_response(message)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 502
+
+    def generate():
+        parts = []
+        try:
+            for token in tokens:
+                parts.append(token)
+                yield _sse({'token': token})
+        except Exception as e:
+            yield _sse({'error': f"AI network error: {str(e)}"}, event='error')
+            return
+        ai_response = ''.join(parts).strip()
+        queue_message(
+            user_id=user_id,
+            role='ai',
+            message=ai_response,
+            session_id=session_id,
+            chat_id=chat_id
+        )
+        yield _sse({'message': ai_response}, event='done')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @voice_bp.route('/chat/history/<user_id>', methods=['GET'])
 def chat_history(user_id):
     session_id = request.args.get('session_id')
     chat_id = request.args.get('chat_id')
-    history = get_chat_history(user_id, session_id, chat_id)
-    return jsonify([h for h in history]), 200
+    try:
+        history, next_cursor = get_chat_history_page(user_id, session_id, chat_id, request.args.get('cursor'), request.args.get('limit'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'messages': history, 'next_cursor': next_cursor}), 200
 
 @voice_bp.route('/sessions', methods=['GET'])
 @token_required
@@ -177,7 +265,7 @@ def run_voice_interview():
     scores = []
     for i in range(3):
         speak(f"Here comes question {i + 1}.")
-        question = ask_question(role)
+        question = next_question(role, exclude=results['questions'])
         speak(question)
         time.sleep(1 if test_mode else 7)
         speak("Please answer now.")
@@ -207,28 +295,34 @@ def interview_step():
     data = request.get_json()
     role = data.get('role', '').strip()
     answers = data.get('answers', [])
+    interview_id = data.get('interview_id')
+    user_id = data.get('user_id')
     step = len(answers)
+    state = get_interview_state(interview_id) if interview_id else None
     # Step 0: Welcome and ask for role
     if step == 0:
         prompt = get_welcome_prompt()
-        return jsonify({'prompt': prompt, 'type': 'role'}), 200
-    # Step 1: First question
-    if step == 1:
-        question = ask_question(role)
-        return jsonify({'prompt': question, 'type': 'question', 'index': 1}), 200
-    # Step 2-4: Next questions
-    if 2 <= step <= 3:
-        question = ask_question(role)
-        return jsonify({'prompt': question, 'type': 'question', 'index': step}), 200
+        interview_id = create_interview_state()
+        return jsonify({'prompt': prompt, 'type': 'role', 'interview_id': interview_id}), 200
+    if state is None:
+        # Legacy client (no interview_id) or an expired one: keep this step's state in memory only
+        interview_id = None
+        state = {'questions': []}
+    # Steps 1-3: ask a question and remember it for evaluation
+    if 1 <= step <= 3:
+        questions = state.get('questions') or []
+        question = questions[step - 1] if step - 1 < len(questions) else None
+        if not question:
+            # Retried steps reuse the recorded question instead of generating a new one.
+            question = next_question(role, user_id=user_id, exclude=[q for q in questions if q])
+            if interview_id:
+                set_interview_question(interview_id, step - 1, question, role=role)
+        return jsonify({'prompt': question, 'type': 'question', 'index': step, 'interview_id': interview_id}), 200
     # After 3 answers, evaluate all
     if step == 4:
-        feedbacks = []
-        scores = []
-        for i, answer in enumerate(answers[1:]):
-            question = ask_question(role)
-            score, feedback = evaluate_answer(question, answer)
-            feedbacks.append(feedback)
-            scores.append(score)
+        results = run_async(_evaluate_answers_async(role, answers[1:], state.get('questions') or []))
+        scores = [score for score, _ in results]
+        feedbacks = [feedback for _, feedback in results]
         summary = final_feedback(scores)
-        return jsonify({'type': 'feedback', 'feedbacks': feedbacks, 'scores': scores, 'summary': summary}), 200
-    return jsonify({'prompt': 'Interview complete.'}), 200 
\ No newline at end of file
+        return jsonify({'type': 'feedback', 'feedbacks': feedbacks, 'scores': scores, 'summary': summary, 'interview_id': interview_id}), 200
+    return jsonify({'prompt': 'Interview complete.'}), 200
@@ -64,6 +64,21 @@ async function apiFetch(endpoint, { method = "GET", body = null, isForm = false
   }
 }
 
+// Fetch every page of a cursor-paginated list endpoint and return the concatenated items
+async function fetchAllPages(url, key, options = {}) {
+  let items = [];
+  let cursor = null;
+  do {
+    const sep = url.includes('?') ? '&' : '?';
+    const res = await fetch(cursor ? `${url}${sep}cursor=${encodeURIComponent(cursor)}` : url, options);
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || "API error");
+    items = items.concat(Array.isArray(data) ? data : (data[key] || []));
+    cursor = Array.isArray(data) ? null : data.next_cursor;
+  } while (cursor);
+  return items;
+}
+
 function showError(msg) {
   alert(msg); // Replace with a better UI error display if desired
 }
@@ -253,8 +268,8 @@ window.loadAdminUsers = async function (tableElem) {
     return;
   }
   try {
-    const users = await apiFetch("/admin/users");
-    window.adminUsers = users.users || [];
+    const headers = jwtToken ? { "Authorization": "Bearer " + jwtToken } : {};
+    window.adminUsers = await fetchAllPages(API_BASE + "/admin/users", 'users', { headers });
     renderUsersTable(window.adminUsers, tableElem);
   } catch {
     tableElem.innerHTML = "<tr><td colspan='6'>Failed to load users</td></tr>";
@@ -364,8 +379,8 @@ function renderUsersTable(users, tableElem) {
 // FEEDBACK MANAGEMENT
 window.loadAdminFeedback = async function(tableElem) {
   try {
-    const res = await apiFetch('/admin/feedback');
-    window.adminFeedback = res.feedback || [];
+    const headers = jwtToken ? { "Authorization": "Bearer " + jwtToken } : {};
+    window.adminFeedback = await fetchAllPages(API_BASE + '/admin/feedback', 'feedbacks', { headers });
     renderFeedbackTable(window.adminFeedback, tableElem);
   } catch {
     tableElem.innerHTML = "<tr><td colspan='6'>Failed to load feedback</td></tr>";
@@ -398,8 +413,15 @@ function renderFeedbackTable(feedback, tableElem) {
 // CHAT MANAGEMENT
 window.loadAdminChats = async function(tableElem) {
   try {
-    const chats = await apiFetch('/admin/chats');
-    window.adminChats = Array.isArray(chats) ? chats : (chats.chats || []);
+    // Follow next_cursor so search/sort still see every session; each page is summaries only
+    let allChats = [];
+    let cursor = null;
+    do {
+      const chats = await apiFetch('/admin/chats' + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''));
+      allChats = allChats.concat(Array.isArray(chats) ? chats : (chats.chats || []));
+      cursor = Array.isArray(chats) ? null : chats.next_cursor;
+    } while (cursor);
+    window.adminChats = allChats;
     displayChats(window.adminChats);
   } catch {
     tableElem.innerHTML = "<tr><td colspan='5'>Failed to load chats</td></tr>";
@@ -474,6 +496,13 @@ function displayChats(chats) {
 async function viewChatSession(sessionId) {
     try {
         const session = await apiFetch(`/admin/chats?session_id=${sessionId}`);
+        // The transcript comes in ranges; follow next_start until it is complete
+        let nextStart = session.next_start;
+        while (nextStart !== null && nextStart !== undefined) {
+            const more = await apiFetch(`/admin/chats?session_id=${sessionId}&start=${nextStart}`);
+            session.chats = (session.chats || []).concat(more.chats || []);
+            nextStart = more.next_start;
+        }
         // Fill modal fields
         document.getElementById('modalSessionName').textContent = session.session_name || '';
         document.getElementById('modalUserName').textContent = session.user_name || '';
@@ -525,10 +554,15 @@ function exportChatSession(sessionId) {
 
 window.saveAISettings = async function() {
   const aiModel = document.getElementById('aiModelSelect').value;
+  const responseLength = document.getElementById('responseLengthSelect')?.value;
+  const temperature = document.getElementById('temperatureRange')?.value;
+  const body = { aiModel };
+  if (responseLength) body.responseLength = responseLength;
+  if (temperature !== undefined) body.temperature = parseFloat(temperature);
   try {
     await apiFetch('/admin/settings/ai', {
       method: 'POST',
-      body: { aiModel }
+      body
     });
     alert('AI settings saved successfully!');
   } catch (err) {
@@ -557,7 +591,29 @@ window.saveFeatureSettings = async function() {
   }
 };
 
-// Optionally, add logic to load current settings from backend if GET endpoints are available
+// Fill the settings panel with the values the backend is currently using
+window.loadAdminSettings = async function() {
+  try {
+    const settings = await apiFetch('/admin/settings');
+    const ai = settings.ai_config || {};
+    const toggles = settings.feature_toggles || {};
+    const setValue = (id, value) => { const el = document.getElementById(id); if (el && value !== undefined && value !== null) el.value = value; };
+    const setChecked = (id, value) => { const el = document.getElementById(id); if (el && typeof value === 'boolean') el.checked = value; };
+    setValue('aiModelSelect', ai.ai_model);
+    setValue('responseLengthSelect', ai.response_length);
+    setValue('temperatureRange', ai.temperature);
+    if (ai.temperature !== undefined && document.getElementById('temperatureValue')) {
+      document.getElementById('temperatureValue').innerText = ai.temperature;
+    }
+    setChecked('speechToSpeechToggle', toggles.speech_to_speech);
+    setChecked('textChatToggle', toggles.text_chat);
+    setChecked('feedbackToggle', toggles.feedback);
+    setChecked('analyticsToggle', toggles.analytics);
+    setChecked('autoRefreshToggle', toggles.auto_refresh);
+  } catch (err) {
+    console.error('Failed to load settings:', err);
+  }
+};
 
 // Navbar scroll effect
 function handleScroll() {
@@ -941,25 +997,22 @@ function extractScore(improvementText) {
 window.getLatestImprovementScore = async function() {
   const jwtToken = localStorage.getItem('jwtToken');
   const userName = localStorage.getItem('userName') || 'anonymous';
-  const res = await fetch(`${API_BASE}/feedback/list?user_id=${encodeURIComponent(userName)}`, {
+  const feedback = await fetchAllPages(`${API_BASE}/feedback/list?user_id=${encodeURIComponent(userName)}`, 'feedback', {
     headers: { 'Authorization': 'Bearer ' + jwtToken }
   });
-  const data = await res.json();
-  const improvements = (data.feedback || []).filter(fb => fb.type === 'improvement' && fb.improvement);
+  const improvements = feedback.filter(fb => fb.type === 'improvement' && fb.improvement);
   if (improvements.length === 0) return null;
-  // Use the latest improvement
-  const latest = improvements[improvements.length - 1].improvement;
+  // /feedback/list pages newest first
+  const latest = improvements[0].improvement;
   return extractScore(latest);
 } 
 
 // Suggestions Management
 window.loadAdminSuggestions = async function() {
     try {
-        const res = await fetch(`${API_BASE}/feedback/suggest/all`, {
+        const suggestions = await fetchAllPages(`${API_BASE}/feedback/suggest/all`, 'suggest_feedback', {
             headers: { 'Authorization': 'Bearer ' + (localStorage.getItem('jwtToken') || '') }
         });
-        const data = await res.json();
-        const suggestions = data.suggest_feedback || [];
         window.adminSuggestions = suggestions;
         renderSuggestionTable(suggestions);
     } catch (err) {
@@ -1198,6 +1251,10 @@ window.showAdminPanel = function(panel) {
         const chatsTable = document.getElementById('chatsTable');
         if (chatsTable) window.loadAdminChats(chatsTable);
     }
+    // Special: Load current settings if system settings panel
+    if (panel === 'system-settings') {
+        window.loadAdminSettings && window.loadAdminSettings();
+    }
     // Special: Load suggestions if user suggestions panel
     if (panel === 'user-suggestions') {
         window.loadAdminSuggestions && window.loadAdminSuggestions();
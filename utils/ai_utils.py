@@ -1,8 +1,17 @@
 import subprocess
 import requests
-import whisper
+from requests.adapters import HTTPAdapter
+from utils.whisper_registry import whisper_registry
+from utils.llm_cache import response_cache, make_cache_key
+from utils.model_health import model_health
+from utils.settings_service import settings_service
 import os
 import json
+import threading
+import time
+
+_http_session = None
+_http_session_lock = threading.Lock()
 
 
 def _groq_api_url():
@@ -28,6 +37,81 @@ def _groq_fallback_models():
     ]
 
 
+# Admin "response length" setting -> completion token budget
+RESPONSE_LENGTH_MAX_TOKENS = {
+    'short': 300,
+    'medium': 800,
+    'long': 2000
+}
+
+
+def _ai_settings():
+    """Admin AI settings from the hot-reloaded settings snapshot; {} if unavailable"""
+    try:
+        return settings_service.ai_config()
+    except Exception as e:
+        print(f"AI settings unavailable, using defaults: {e}")
+        return {}
+
+
+def _groq_temperature():
+    temperature = _ai_settings().get('temperature')
+    if isinstance(temperature, (int, float)) and not isinstance(temperature, bool) and 0 <= temperature <= 2:
+        return float(temperature)
+    return float(os.getenv('GROQ_TEMPERATURE', '0.3'))
+
+
+def _groq_max_tokens():
+    """Token cap for completions from the admin response length; None leaves it to the provider"""
+    response_length = _ai_settings().get('response_length')
+    if response_length in RESPONSE_LENGTH_MAX_TOKENS:
+        return RESPONSE_LENGTH_MAX_TOKENS[response_length]
+    env_max_tokens = os.getenv('GROQ_MAX_TOKENS', '').strip()
+    return int(env_max_tokens) if env_max_tokens else None
+
+
+def _groq_pool_size():
+    return int(os.getenv('GROQ_POOL_SIZE', '10'))
+
+
+def _groq_pool_connections():
+    # Number of distinct hosts kept alive; the chat path only talks to one.
+    return int(os.getenv('GROQ_POOL_CONNECTIONS', '2'))
+
+
+def _groq_timeouts():
+    connect_timeout = float(os.getenv('GROQ_CONNECT_TIMEOUT', '5'))
+    read_timeout = float(os.getenv('GROQ_READ_TIMEOUT', '45'))
+    return (connect_timeout, read_timeout)
+
+
+def get_http_session():
+    """Return the shared keep-alive HTTP session used for LLM calls"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=_groq_pool_connections(),
+                    pool_maxsize=_groq_pool_size(),
+                    pool_block=False
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def close_http_session():
+    """Close pooled connections (e.g. on worker shutdown)"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
+
 def _resolve_model(model):
     # Backward compatibility for old local-model names.
     aliases = {
@@ -38,16 +122,20 @@ def _resolve_model(model):
         'experimental': 'llama-3.3-70b-versatile'
     }
     if not model:
-        return _groq_default_model()
+        # Admin-selected model, when one has been saved
+        model = _ai_settings().get('ai_model')
+        if not model:
+            return _groq_default_model()
     return aliases.get(model, model)
 
 # Whisper transcription
-def transcribe_audio(file_path):
-    model = whisper.load_model('base')
+def transcribe_audio(file_path, model_name=None):
+    # Models stay resident in the registry; only the first call per size pays the load.
+    model = whisper_registry.get(model_name)
     result = model.transcribe(file_path)
     return result['text']
 
-def _groq_chat(prompt, model=None):
+def _groq_request(prompt, model=None, stream=False):
     api_key = _groq_api_key()
     if not api_key:
         raise ValueError('GROQ_API_KEY is not set in environment variables.')
@@ -57,16 +145,25 @@ def _groq_chat(prompt, model=None):
         'messages': [
             {'role': 'user', 'content': prompt}
         ],
-        'temperature': 0.3
+        'temperature': _groq_temperature()
     }
+    max_tokens = _groq_max_tokens()
+    if max_tokens:
+        payload['max_tokens'] = max_tokens
+    if stream:
+        payload['stream'] = True
     headers = {
         'Authorization': f'Bearer {api_key}',
         'Content-Type': 'application/json'
     }
 
-    response = requests.post(_groq_api_url(), json=payload, headers=headers, timeout=45)
+    response = get_http_session().post(_groq_api_url(), json=payload, headers=headers, timeout=_groq_timeouts(), stream=stream)
     response.raise_for_status()
-    data = response.json()
+    return response
+
+
+def _groq_chat(prompt, model=None):
+    data = _groq_request(prompt, model=model).json()
     choices = data.get('choices', [])
     if choices:
         message = choices[0].get('message', {})
@@ -74,54 +171,169 @@ def _groq_chat(prompt, model=None):
     return ''
 
 
+def _groq_stream_tokens(response):
+    """Yield content deltas from an OpenAI-compatible server-sent event stream"""
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            choices = json.loads(data).get('choices', [])
+            if choices:
+                token = choices[0].get('delta', {}).get('content')
+                if token:
+                    yield token
+    finally:
+        response.close()
+
+
+def _http_error_details(e):
+    details = ''
+    if getattr(e, 'response', None) is not None:
+        try:
+            error_data = e.response.json()
+            details = error_data.get('error', {}).get('message', '')
+        except Exception:
+            details = e.response.text
+    return details
+
+
+def _is_retryable_model_error(details):
+    # Retry on model-level issues, otherwise give up on the chain.
+    retryable_markers = [
+        'blocked at the project level',
+        'model',
+        'not found',
+        'unsupported'
+    ]
+    lowered = (details or '').lower()
+    return any(marker in lowered for marker in retryable_markers)
+
+
+def _is_model_unavailable_error(details):
+    # The model itself is gone or blocked; retrying it before the cooldown is pointless.
+    unavailable_markers = [
+        'blocked at the project level',
+        'decommissioned',
+        'does not exist',
+        'not found',
+        'unsupported'
+    ]
+    lowered = (details or '').lower()
+    return any(marker in lowered for marker in unavailable_markers)
+
+
+def _record_http_failure(model, e, details):
+    status = e.response.status_code if getattr(e, 'response', None) is not None else None
+    if _is_model_unavailable_error(details):
+        model_health.record_failure(model, fatal=True)
+    elif status is None or status == 429 or status >= 500 or _is_retryable_model_error(details):
+        model_health.record_failure(model)
+    else:
+        # Client-side errors (bad key, bad payload) say nothing about model health.
+        model_health.release(model)
+
+
+def _models_to_try(model=None):
+    """Requested model followed by the fallbacks, minus open circuits, ranked by recent health"""
+    primary_model = _resolve_model(model)
+    fallback_models = [m for m in _groq_fallback_models() if m != primary_model]
+    return model_health.order([primary_model] + fallback_models)
+
+
 def ollama_chat(prompt):
     # Backward-compatible wrapper name; now routed to Groq.
     return _groq_chat(prompt)
 
-def get_ai_response(prompt, model=None):
-    attempted_models = []
-    primary_model = _resolve_model(model)
-    fallback_models = [m for m in _groq_fallback_models() if m != primary_model]
-    models_to_try = [primary_model] + fallback_models
+def is_ai_error_response(response):
+    return response.startswith(('AI error:', 'AI HTTP error:', 'AI network error:', 'AI provider returned'))
 
+def get_ai_response(prompt, model=None, use_cache=True):
+    """Return the completion for `prompt`; identical prompts are served from response_cache unless use_cache=False"""
+    if not use_cache:
+        return _get_ai_response_uncached(prompt, model)[0]
+    primary = _resolve_model(model)
+    cache_key = make_cache_key(primary, _groq_temperature(), prompt, _groq_max_tokens())
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    response, answered_by = _get_ai_response_uncached(prompt, model)
+    # A fallback model's answer must not be served as the primary's once it recovers
+    if response and answered_by == primary and not is_ai_error_response(response):
+        response_cache.set(cache_key, response)
+    return response
+
+def _get_ai_response_uncached(prompt, model=None):
+    """(response, model that produced it) from the first healthy model; the model is None for errors"""
+    attempted_models = []
     last_http_error = None
-    for candidate_model in models_to_try:
+    for candidate_model in _models_to_try(model):
+        if not model_health.allow(candidate_model):
+            continue
         attempted_models.append(candidate_model)
+        started = time.monotonic()
         try:
             response = _groq_chat(prompt, model=candidate_model)
+            model_health.record_success(candidate_model, time.monotonic() - started)
             if response:
-                return response
+                return response, candidate_model
         except requests.exceptions.HTTPError as e:
-            details = ''
-            if getattr(e, 'response', None) is not None:
-                try:
-                    error_data = e.response.json()
-                    details = error_data.get('error', {}).get('message', '')
-                except Exception:
-                    details = e.response.text
-
-            # Retry on model-level issues, otherwise return immediately.
-            retryable_markers = [
-                'blocked at the project level',
-                'model',
-                'not found',
-                'unsupported'
-            ]
-            lowered = (details or '').lower()
-            if any(marker in lowered for marker in retryable_markers):
+            details = _http_error_details(e)
+            _record_http_failure(candidate_model, e, details)
+            if _is_retryable_model_error(details):
                 last_http_error = details or str(e)
                 continue
-            return f"AI HTTP error: {details or str(e)}"
+            return f"AI HTTP error: {details or str(e)}", None
         except requests.exceptions.RequestException as e:
-            return f"AI network error: {str(e)}"
+            model_health.record_failure(candidate_model)
+            return f"AI network error: {str(e)}", None
         except Exception as e:
-            return f"AI error: {str(e)}"
+            model_health.release(candidate_model)
+            return f"AI error: {str(e)}", None
 
+    if not attempted_models:
+        return "AI error: all models are cooling down after repeated failures. Please retry shortly.", None
     if last_http_error:
-        return f"AI HTTP error: {last_http_error}. Tried models: {', '.join(attempted_models)}"
-    return f"AI provider returned an empty response. Tried models: {', '.join(attempted_models)}"
+        return f"AI HTTP error: {last_http_error}. Tried models: {', '.join(attempted_models)}", None
+    return f"AI provider returned an empty response. Tried models: {', '.join(attempted_models)}", None
+
+def stream_ai_response(prompt, model=None):
+    """Open a streaming completion and return a generator of content tokens.
+
+    The fallback chain is walked until a model accepts the request, so errors
+    surface here (as RuntimeError) before the first token is yielded.
+    """
+    attempted_models = []
+    last_http_error = None
+    for candidate_model in _models_to_try(model):
+        if not model_health.allow(candidate_model):
+            continue
+        attempted_models.append(candidate_model)
+        started = time.monotonic()
+        try:
+            response = _groq_request(prompt, model=candidate_model, stream=True)
+            model_health.record_success(candidate_model, time.monotonic() - started)
+            return _groq_stream_tokens(response)
+        except requests.exceptions.HTTPError as e:
+            details = _http_error_details(e)
+            _record_http_failure(candidate_model, e, details)
+            if _is_retryable_model_error(details):
+                last_http_error = details or str(e)
+                continue
+            raise RuntimeError(f"AI HTTP error: {details or str(e)}")
+        except requests.exceptions.RequestException as e:
+            model_health.record_failure(candidate_model)
+            raise RuntimeError(f"AI network error: {str(e)}")
+        except Exception:
+            model_health.release(candidate_model)
+            raise
+    if not attempted_models:
+        raise RuntimeError("AI error: all models are cooling down after repeated failures. Please retry shortly.")
+    raise RuntimeError(f"AI HTTP error: {last_http_error}. Tried models: {', '.join(attempted_models)}")
 
-def get_ai_feedback(user_input, model=None):
+def get_ai_feedback(user_input, model=None, use_cache=True):
     """Generate AI feedback for user input/suggestions"""
     prompt = f"""
     Analyze the following user input and provide structured feedback in JSON format:
@@ -140,7 +352,7 @@ def get_ai_feedback(user_input, model=None):
     """
     
     try:
-        ai_response = get_ai_response(prompt, model)
+        ai_response = get_ai_response(prompt, model, use_cache=use_cache)
         return ai_response
     except Exception as e:
         # Fallback response if AI fails
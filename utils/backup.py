@@ -0,0 +1,224 @@
+import gzip
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from bson import json_util
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from mongo_client import mongo
+from utils.exporter import EXPORT_COLLECTIONS, parse_collections, write_export
+
+MANIFEST_NAME = 'manifest.json'
+
+# Serialises backups across every worker process and the CLI, not just this process
+LOCK_ID = 'backup'
+
+_manifest_lock = threading.Lock()
+
+
+class BackupInProgress(Exception):
+    """Another process holds the backup lock"""
+
+
+def _backup_dir():
+    return os.getenv('BACKUP_DIR', 'backups')
+
+
+def _backup_lock_ttl():
+    # A crashed backup's lock is taken over after this many seconds
+    return int(os.getenv('BACKUP_LOCK_TTL', '3600'))
+
+
+def _acquire_lock():
+    owner = uuid.uuid4().hex
+    now = datetime.utcnow()
+    try:
+        # Matches only an expired lock; with none at all the upsert creates it, and a live
+        # one makes the upsert collide on _id
+        mongo.db.locks.update_one(
+            {'_id': LOCK_ID, 'expires_at': {'$lt': now}},
+            {'$set': {'owner': owner, 'acquired_at': now, 'expires_at': now + timedelta(seconds=_backup_lock_ttl())}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        raise BackupInProgress('A backup is already running')
+    return owner
+
+
+def _release_lock(owner):
+    mongo.db.locks.delete_one({'_id': LOCK_ID, 'owner': owner})
+
+
+def _manifest_path(backup_dir=None):
+    return os.path.join(backup_dir or _backup_dir(), MANIFEST_NAME)
+
+
+def load_manifest(backup_dir=None):
+    """The backup chain: {'marks': {collection: iso}, 'segments': [...]}, oldest segment first"""
+    path = _manifest_path(backup_dir)
+    if not os.path.exists(path):
+        return {'marks': {}, 'segments': []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, backup_dir=None):
+    path = _manifest_path(backup_dir)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_backup(mode='incremental', collections=None, compress=True, backup_dir=None):
+    """Write one backup segment and advance the per-collection high-water marks.
+
+    A full segment dumps every selected collection. An incremental segment only holds
+    documents created or updated (created_at/updated_at/timestamp, or ObjectId time)
+    since that collection's last mark; collections never backed up are dumped in full.
+    Each mark is the time the segment *started*, so writes racing a backup are picked
+    up again by the next one. Deletes are not tracked; take a full backup to drop them.
+    Raises BackupInProgress while another process or thread is writing a segment.
+    """
+    if mode not in ('full', 'incremental'):
+        raise ValueError("mode must be 'full' or 'incremental'")
+    collections = parse_collections(collections)
+    backup_dir = backup_dir or _backup_dir()
+
+    if not _manifest_lock.acquire(blocking=False):
+        raise BackupInProgress('A backup is already running')
+    try:
+        owner = _acquire_lock()
+        try:
+            return _write_segment(mode, collections, compress, backup_dir)
+        finally:
+            _release_lock(owner)
+    finally:
+        _manifest_lock.release()
+
+
+def _write_segment(mode, collections, compress, backup_dir):
+    manifest = load_manifest(backup_dir)
+    since = {}
+    if mode == 'incremental':
+        since = {
+            name: datetime.fromisoformat(manifest['marks'][name])
+            for name in collections if name in manifest['marks']
+        }
+
+    started_at = datetime.utcnow()
+    filename = f"backup_{started_at.strftime('%Y%m%d_%H%M%S_%f')}_{mode}.ndjson" + ('.gz' if compress else '')
+    documents = write_export(os.path.join(backup_dir, filename), collections, since, compress=compress)
+
+    segment = {
+        'file': filename,
+        'mode': mode,
+        'started_at': started_at.isoformat(),
+        'collections': collections,
+        'since': {name: value.isoformat() for name, value in since.items()},
+        'documents': documents
+    }
+    manifest['segments'].append(segment)
+    for name in collections:
+        manifest['marks'][name] = started_at.isoformat()
+    _save_manifest(manifest, backup_dir)
+    return segment
+
+
+def restore_plan(manifest, until=None):
+    """[(segment, collections to apply)] needed to rebuild every collection from its latest full dump.
+
+    A collection is restored from the last segment that dumped it in full (a full
+    segment, or its first-ever appearance) followed by every later increment.
+    `until` stops the chain at that segment file, for point-in-time restores.
+    """
+    segments = manifest['segments']
+    if until is not None:
+        names = [segment['file'] for segment in segments]
+        if until not in names:
+            raise ValueError(f'Unknown backup segment: {until}')
+        segments = segments[:names.index(until) + 1]
+
+    base = {}
+    for index, segment in enumerate(segments):
+        for name in segment['collections']:
+            if segment['mode'] == 'full' or name not in segment.get('since', {}):
+                base[name] = index
+
+    plan = []
+    for index, segment in enumerate(segments):
+        apply = [name for name in segment['collections'] if name in base and index >= base[name]]
+        if apply:
+            plan.append((segment, apply))
+    return plan
+
+
+def _iter_segment(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json_util.loads(line)
+            if 'export' in record:
+                continue
+            yield record['collection'], record['document']
+
+
+def _flush(name, ops, ordered):
+    if ops:
+        mongo.db[EXPORT_COLLECTIONS[name]].bulk_write(ops, ordered=ordered)
+        ops.clear()
+
+
+def restore_segment(path, collections, fresh=(), batch_size=1000):
+    """Replay one segment file into Mongo; returns {collection: documents applied}.
+
+    Collections in `fresh` were just emptied, so their documents are bulk inserted;
+    everything else is upserted by _id so increments overwrite older versions.
+    """
+    pending = {name: [] for name in collections}
+    counts = {name: 0 for name in collections}
+    for name, doc in _iter_segment(path):
+        if name not in pending:
+            continue
+        if name in fresh:
+            pending[name].append(InsertOne(doc))
+        else:
+            pending[name].append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+        counts[name] += 1
+        if len(pending[name]) >= batch_size:
+            _flush(name, pending[name], ordered=name not in fresh)
+    for name, ops in pending.items():
+        _flush(name, ops, ordered=name not in fresh)
+    return counts
+
+
+def restore_backup(backup_dir=None, until=None, drop=False, collections=None, batch_size=1000, log=print):
+    """Replay the latest full backup plus its increments. Returns {collection: documents applied}."""
+    backup_dir = backup_dir or _backup_dir()
+    manifest = load_manifest(backup_dir)
+    plan = restore_plan(manifest, until)
+    wanted = set(parse_collections(collections))
+
+    totals = {}
+    emptied = set()
+    for segment, apply in plan:
+        apply = [name for name in apply if name in wanted]
+        if not apply:
+            continue
+        fresh = set()
+        if drop:
+            for name in apply:
+                if name not in emptied:
+                    mongo.db[EXPORT_COLLECTIONS[name]].delete_many({})
+                    emptied.add(name)
+                    fresh.add(name)
+        log(f"{segment['file']}: {', '.join(apply)}")
+        counts = restore_segment(os.path.join(backup_dir, segment['file']), apply, fresh, batch_size)
+        for name, count in counts.items():
+            totals[name] = totals.get(name, 0) + count
+    return totals
@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+import zlib
+from datetime import datetime
+
+from bson import ObjectId, json_util
+from mongo_client import mongo
+
+# Export name -> Mongo collection
+EXPORT_COLLECTIONS = {
+    'users': 'users',
+    'feedback': 'feedback',
+    'suggest_feedback': 'suggest_feedback',
+    'sessions': 'session',
+    'transcripts': 'transcript_buckets',
+    'chats': 'chats',
+    'settings': 'settings',
+    'system_settings': 'system_settings'
+}
+
+# Per Mongo collection, the timestamps its writes maintain: any of them at or after
+# `since` puts a document in an incremental export. Every field listed here has an
+# index in models/indexes.py, so each $or branch is an index scan, not a collection scan.
+CHANGE_FIELDS = {
+    'users': ['updated_at', 'created_at'],
+    'feedback': ['updated_at', 'created_at'],
+    'suggest_feedback': ['updated_at', 'created_at'],
+    'session': ['updated_at', 'created_at'],
+    'transcript_buckets': ['updated_at'],
+    'chats': ['timestamp'],
+    'settings': ['updated_at'],
+    'system_settings': ['updated_at']
+}
+
+_JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+
+
+def parse_collections(value):
+    """Validate a comma-separated (or list) selection of export names; None means all"""
+    if not value:
+        return list(EXPORT_COLLECTIONS)
+    names = value.split(',') if isinstance(value, str) else list(value)
+    names = [n.strip() for n in names if n.strip()]
+    unknown = [n for n in names if n not in EXPORT_COLLECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown collections: {', '.join(unknown)}")
+    return names
+
+
+def parse_since(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', ''))
+    except ValueError:
+        raise ValueError('since must be an ISO-8601 timestamp')
+
+
+def _since_query(since, collection):
+    if since is None:
+        return {}
+    # Documents without any timestamp field are still caught by their ObjectId creation time
+    clauses = [{field: {'$gte': since}} for field in CHANGE_FIELDS[collection]]
+    clauses.append({'_id': {'$gte': ObjectId.from_datetime(since)}})
+    return {'$or': clauses}
+
+
+def _since_for(since, name):
+    return since.get(name) if isinstance(since, dict) else since
+
+
+def iter_ndjson(collections=None, since=None, batch_size=500):
+    """Yield the export as NDJSON lines (str), one document at a time.
+
+    The first line is a header; every other line is {"collection", "document"} with
+    documents in MongoDB relaxed extended JSON so ObjectIds and dates round-trip.
+    `since` is one datetime for every collection, or a {name: datetime} dict.
+    """
+    collections = parse_collections(collections)
+    header = {
+        'export': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'collections': collections,
+            'since': {
+                name: _since_for(since, name).isoformat() if _since_for(since, name) else None
+                for name in collections
+            }
+        }
+    }
+    yield json.dumps(header) + '\n'
+    for name in collections:
+        collection = EXPORT_COLLECTIONS[name]
+        query = _since_query(_since_for(since, name), collection)
+        cursor = mongo.db[collection].find(query).batch_size(batch_size)
+        if not query:
+            # Only full dumps are ordered: sorting an incremental $or on _id would tempt the
+            # planner into walking the whole _id index instead of the per-branch ranges
+            cursor = cursor.sort('_id', 1)
+        for doc in cursor:
+            yield json_util.dumps({'collection': name, 'document': doc}, json_options=_JSON_OPTIONS) + '\n'
+
+
+def gzip_stream(lines, level=6):
+    """Incrementally gzip an iterable of text lines into byte chunks"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for line in lines:
+        chunk = compressor.compress(line.encode('utf-8'))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def write_export(path, collections=None, since=None, compress=True, batch_size=500):
+    """Stream an export to `path` without holding it in memory. Returns the number of documents."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    opener = gzip.open if compress else open
+    count = -1  # header line is not a document
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for line in iter_ndjson(collections, since, batch_size):
+            f.write(line)
+            count += 1
+    return count
@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from bson import Binary, Decimal128, ObjectId, Timestamp
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def bson_default(o):
+    """Encode the BSON and stdlib types Mongo documents carry; used by both encoders"""
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, datetime):
+        # Stored datetimes are naive UTC; say so, or browsers read them as local time
+        return (o.replace(tzinfo=timezone.utc) if o.tzinfo is None else o).isoformat()
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, Timestamp):
+        return o.as_datetime().isoformat()
+    if isinstance(o, Decimal128):
+        return str(o.to_decimal())
+    if isinstance(o, (Decimal, UUID)):
+        return str(o)
+    if isinstance(o, (Binary, bytes)):
+        return base64.b64encode(o).decode('ascii')
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """jsonify/request.json for raw Mongo documents: ObjectId as its hex string, datetimes as ISO 8601 UTC.
+
+    Uses orjson when it is installed and falls back to the stdlib encoder otherwise
+    (or for values orjson rejects, such as integers wider than 64 bits). Keys are not
+    sorted, which is most of the stdlib encoder's cost on large admin lists.
+    """
+
+    sort_keys = False
+
+    def _orjson_options(self, indent):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj, indent=None):
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=bson_default, option=self._orjson_options(indent))
+            except (orjson.JSONEncodeError, TypeError):
+                pass
+        return json.dumps(obj, default=bson_default, ensure_ascii=self.ensure_ascii,
+                          sort_keys=self.sort_keys, indent=indent,
+                          separators=None if indent else (',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and set(kwargs) <= {'indent'}:
+            return self._dumps_bytes(obj, kwargs.get('indent')).decode('utf-8')
+        kwargs.setdefault('default', bson_default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        # Encoded straight to bytes, skipping the str round-trip of the default provider
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
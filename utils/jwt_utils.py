@@ -1,8 +1,16 @@
 import jwt
+import hashlib
+import os
+import time
 from flask import request, jsonify, g
 from functools import wraps
 from config import JWT_SECRET
 from datetime import datetime, timedelta
+from utils.lru import LRUCache
+from models.user import get_user_cached
+
+# Verified token payloads keyed by token digest; each entry lives until the token's exp
+_token_cache = LRUCache(int(os.getenv('JWT_CACHE_SIZE', '1024')), ttl=0)
 
 def encode_auth_token(user_id, role):
     payload = {
@@ -14,13 +22,27 @@ def encode_auth_token(user_id, role):
     return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
 
 def decode_auth_token(token):
+    digest = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    payload = _token_cache.get(digest)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    remaining = payload.get('exp', 0) - time.time() if isinstance(payload.get('exp'), (int, float)) else 0
+    if remaining > 0:
+        _token_cache.set(digest, payload, ttl=remaining)
+    return payload
+
+def current_user():
+    """The authenticated user's document, fetched at most once per request (None if unknown)"""
+    if 'current_user' not in g:
+        user_id = g.get('user_id')
+        g.current_user = get_user_cached(user_id) if user_id else None
+    return g.current_user
 
 def token_required(f):
     @wraps(f)
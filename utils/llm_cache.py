@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+
+from utils.lru import LRUCache
+
+
+def _cache_enabled():
+    return os.getenv('LLM_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+
+def _cache_size():
+    return int(os.getenv('LLM_CACHE_SIZE', '512'))
+
+
+def _cache_ttl():
+    return float(os.getenv('LLM_CACHE_TTL', '3600'))
+
+
+def _cache_mongo_enabled():
+    return os.getenv('LLM_CACHE_MONGO', 'false').lower() in ('1', 'true', 'yes')
+
+
+def make_cache_key(model, temperature, prompt, max_tokens=None):
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    if max_tokens:
+        return f"{model}|{temperature}|{max_tokens}|{prompt_hash}"
+    return f"{model}|{temperature}|{prompt_hash}"
+
+
+class LRUCacheTier(LRUCache):
+    """In-process tier: bounded by entry count, entries expire after `ttl` seconds"""
+
+    name = 'memory'
+
+
+class MongoCacheTier:
+    """Shared tier in the llm_cache collection; expires_at is enforced on read and by a TTL index"""
+
+    name = 'mongo'
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+
+    @property
+    def _collection(self):
+        from mongo_client import mongo
+        return mongo.db.llm_cache
+
+    def get(self, key):
+        doc = self._collection.find_one({'_id': key, 'expires_at': {'$gt': datetime.utcnow()}})
+        return doc['response'] if doc else None
+
+    def set(self, key, value):
+        self._collection.update_one(
+            {'_id': key},
+            {'$set': {'response': value, 'expires_at': datetime.utcnow() + timedelta(seconds=self.ttl)}},
+            upsert=True
+        )
+
+    def clear(self):
+        self._collection.delete_many({})
+
+    def __len__(self):
+        return self._collection.estimated_document_count()
+
+
+class ResponseCache:
+    """Tiered LLM response cache; tiers are checked in order and earlier tiers are back-filled on a hit"""
+
+    def __init__(self, tiers=None, enabled=None):
+        if tiers is None:
+            tiers = [LRUCacheTier(_cache_size(), _cache_ttl())]
+            if _cache_mongo_enabled():
+                tiers.append(MongoCacheTier(_cache_ttl()))
+        self.tiers = tiers
+        self.enabled = _cache_enabled() if enabled is None else enabled
+        self._stats = {'hits': 0, 'misses': 0, 'tier_hits': {tier.name: 0 for tier in tiers}}
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                print(f"LLM cache tier {tier.name} read failed: {e}")
+                continue
+            if value is not None:
+                for upper in self.tiers[:index]:
+                    upper.set(key, value)
+                self._record('hits', tier.name)
+                return value
+        self._record('misses')
+        return None
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        for tier in self.tiers:
+            try:
+                tier.set(key, value)
+            except Exception as e:
+                print(f"LLM cache tier {tier.name} write failed: {e}")
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = {
+                'enabled': self.enabled,
+                'hits': self._stats['hits'],
+                'misses': self._stats['misses'],
+                'tier_hits': dict(self._stats['tier_hits'])
+            }
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['sizes'] = {}
+        for tier in self.tiers:
+            try:
+                stats['sizes'][tier.name] = len(tier)
+            except Exception:
+                stats['sizes'][tier.name] = None
+        return stats
+
+    def _record(self, counter, tier_name=None):
+        with self._stats_lock:
+            self._stats[counter] += 1
+            if tier_name:
+                self._stats['tier_hits'][tier_name] = self._stats['tier_hits'].get(tier_name, 0) + 1
+
+
+response_cache = ResponseCache()
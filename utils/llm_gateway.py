@@ -0,0 +1,49 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ai_utils import get_ai_response
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _llm_max_concurrency():
+    return int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+
+
+def _llm_timeout():
+    return float(os.getenv('LLM_TIMEOUT', '60'))
+
+
+def _get_executor():
+    # One pool per process: it bounds concurrent LLM calls across all requests.
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_llm_max_concurrency(),
+                    thread_name_prefix='llm-gateway'
+                )
+    return _executor
+
+
+async def ai_response_async(prompt, model=None, timeout=None, use_cache=True):
+    """Awaitable get_ai_response; returns an 'AI error:' string on timeout like the sync path"""
+    timeout = _llm_timeout() if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    call = functools.partial(get_ai_response, prompt, model, use_cache=use_cache)
+    future = loop.run_in_executor(_get_executor(), call)
+    try:
+        # Cancelling the wrapper also drops the call if it is still queued in the pool.
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        return f"AI error: request timed out after {timeout:g}s"
+
+
+def run_async(coro):
+    """Run a coroutine to completion from synchronous (Flask) code"""
+    return asyncio.run(coro)
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _breaker_failure_threshold():
+    return int(os.getenv('MODEL_BREAKER_FAILURES', '3'))
+
+
+def _breaker_cooldown():
+    return float(os.getenv('MODEL_BREAKER_COOLDOWN', '60'))
+
+
+class _ModelState:
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        # Exponentially weighted recent history; new models start optimistic.
+        self.success_rate = 1.0
+        self.latency = None
+
+
+class ModelHealthTracker:
+    """Per-model circuit breaker plus recent success-rate/latency memory for the fallback chain"""
+
+    def __init__(self, failure_threshold=None, cooldown=None, alpha=0.2):
+        self.failure_threshold = _breaker_failure_threshold() if failure_threshold is None else failure_threshold
+        self.cooldown = _breaker_cooldown() if cooldown is None else cooldown
+        self.alpha = alpha
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _get(self, model):
+        if model not in self._models:
+            self._models[model] = _ModelState()
+        return self._models[model]
+
+    def allow(self, model):
+        """Whether a request may be sent to `model` now; claims the half-open probe slot if so"""
+        with self._lock:
+            state = self._get(model)
+            if state.state == OPEN and time.monotonic() - state.opened_at >= self.cooldown:
+                state.state = HALF_OPEN
+                state.probe_in_flight = False
+            if state.state == CLOSED:
+                return True
+            if state.state == HALF_OPEN and not state.probe_in_flight:
+                state.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, model, latency):
+        with self._lock:
+            state = self._get(model)
+            state.state = CLOSED
+            state.consecutive_failures = 0
+            state.probe_in_flight = False
+            state.success_rate += self.alpha * (1.0 - state.success_rate)
+            state.latency = latency if state.latency is None else state.latency + self.alpha * (latency - state.latency)
+
+    def record_failure(self, model, fatal=False):
+        """Count a failed call; `fatal` (e.g. model decommissioned) opens the circuit immediately"""
+        with self._lock:
+            state = self._get(model)
+            state.consecutive_failures += 1
+            state.probe_in_flight = False
+            state.success_rate -= self.alpha * state.success_rate
+            if fatal or state.state == HALF_OPEN or state.consecutive_failures >= self.failure_threshold:
+                state.state = OPEN
+                state.opened_at = time.monotonic()
+
+    def release(self, model):
+        """Give back a claimed probe slot when the call failed for reasons unrelated to the model"""
+        with self._lock:
+            self._get(model).probe_in_flight = False
+
+    def order(self, models):
+        """Drop models whose circuit is open and rank the fallbacks by recent health.
+
+        The first (requested) model keeps its place while its circuit is closed.
+        """
+        with self._lock:
+            def score(model):
+                state = self._get(model)
+                latency = state.latency if state.latency is not None else 0.0
+                return (-round(state.success_rate, 2), latency)
+            primary, fallbacks = models[:1], sorted(models[1:], key=score)
+        return [m for m in primary + fallbacks if self._is_candidate(m)]
+
+    def _is_candidate(self, model):
+        with self._lock:
+            state = self._get(model)
+            if state.state == CLOSED:
+                return True
+            if state.state == OPEN:
+                return time.monotonic() - state.opened_at >= self.cooldown
+            return not state.probe_in_flight
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                model: {
+                    'state': state.state,
+                    'consecutive_failures': state.consecutive_failures,
+                    'success_rate': round(state.success_rate, 3),
+                    'latency_ms': round(state.latency * 1000, 1) if state.latency is not None else None
+                }
+                for model, state in self._models.items()
+            }
+
+
+model_health = ModelHealthTracker()
@@ -0,0 +1,114 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    """The hashing queue is full or a hash timed out; callers should shed the request"""
+
+
+def _hash_workers():
+    return int(os.getenv('PASSWORD_HASH_WORKERS', str(min(2, os.cpu_count() or 1))))
+
+
+def _hash_queue_size():
+    return int(os.getenv('PASSWORD_HASH_QUEUE', str(max(1, _hash_workers()) * 4)))
+
+
+def _hash_timeout():
+    return float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+
+
+def _hash_method():
+    """werkzeug method string, e.g. "scrypt", "scrypt:32768:8:1" or "pbkdf2:sha256:600000"; None = werkzeug default"""
+    return os.getenv('PASSWORD_HASH_METHOD', '').strip() or None
+
+
+def _hash(password, method):
+    if method:
+        return generate_password_hash(password, method=method)
+    return generate_password_hash(password)
+
+
+def _verify(stored_hash, password):
+    return check_password_hash(stored_hash, password)
+
+
+class PasswordHasher:
+    """Password hashing on a small dedicated thread pool with a bounded queue.
+
+    hashlib's pbkdf2_hmac and scrypt release the GIL, so the workers hash in parallel
+    with request threads without the cost of worker processes (which would re-import
+    app.py and its speech models). At most `queue_size` hashes may be queued or
+    running; beyond that `HashingBusy` is raised at once instead of letting logins pile
+    up behind each other. With workers=0 the hash runs on the calling thread, still
+    behind the same bound.
+    """
+
+    def __init__(self, workers=None, queue_size=None, timeout=None):
+        self.workers = _hash_workers() if workers is None else workers
+        self.queue_size = _hash_queue_size() if queue_size is None else queue_size
+        self.timeout = _hash_timeout() if timeout is None else timeout
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._executor = None
+        self._prefixes = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy('Password hashing queue is full')
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the hash really finishes, even if this request gave up on it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusy('Password hashing timed out')
+
+    def hash(self, password):
+        return self._run(_hash, password, _hash_method())
+
+    def verify(self, stored_hash, password):
+        return self._run(_verify, stored_hash, password)
+
+    def _method_prefix(self, method):
+        # Shorthands such as "scrypt" or "pbkdf2:sha256" expand to full parameters in the
+        # stored hash, so compare against what one probe hash actually records. The probe
+        # goes through the pool like any hash (HashingBusy included) and holds no lock;
+        # concurrent first calls at worst probe twice.
+        prefix = self._prefixes.get(method)
+        if prefix is None:
+            prefix = self._run(_hash, '', method).split('$', 1)[0]
+            self._prefixes[method] = prefix
+        return prefix
+
+    def needs_rehash(self, stored_hash):
+        """Whether `stored_hash` was made with other parameters than PASSWORD_HASH_METHOD.
+
+        May raise HashingBusy the first time a method is seen (see _method_prefix).
+        """
+        method = _hash_method()
+        if not method or not stored_hash:
+            return False
+        return stored_hash.split('$', 1)[0] != self._method_prefix(method)
+
+
+password_hasher = PasswordHasher()
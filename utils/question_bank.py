@@ -0,0 +1,101 @@
+import os
+import re
+import queue
+import threading
+
+from utils.ai_utils import get_ai_response, is_ai_error_response
+from models.question_bank import (
+    normalize_role, count_questions, add_questions, pick_unseen_question,
+    mark_question_seen, get_roles_below_watermark
+)
+
+_refill_queue = queue.Queue()
+_pending_roles = set()
+_pending_lock = threading.Lock()
+_worker = None
+
+
+def _low_watermark():
+    return int(os.getenv('QUESTION_BANK_LOW_WATERMARK', '10'))
+
+
+def _refill_batch_size():
+    return int(os.getenv('QUESTION_BANK_REFILL_BATCH', '10'))
+
+
+def generate_questions(role, count):
+    """Ask the LLM for `count` distinct questions in one round-trip"""
+    prompt = (
+        f"Generate {count} distinct, clear interview questions for a candidate applying for a {role} role. "
+        f"Return one question per line with no numbering and nothing else."
+    )
+    # Every refill must produce new questions, so never serve this prompt from cache.
+    response = get_ai_response(prompt, use_cache=False)
+    if is_ai_error_response(response):
+        return []
+    questions = []
+    for line in response.splitlines():
+        line = re.sub(r'^\s*(?:[-*•]|\d+[.)])\s*', '', line).strip()
+        if line:
+            questions.append(line)
+    return questions
+
+
+def refill_role(role, target=None):
+    """Top the pool for `role` up to `target` questions. Returns how many were added."""
+    target = target or _low_watermark() + _refill_batch_size()
+    missing = target - count_questions(normalize_role(role))
+    if missing <= 0:
+        return 0
+    return add_questions(role, generate_questions(role, min(missing, _refill_batch_size())))
+
+
+def refill_low_roles(target=None):
+    """Batch job: refill every pooled role below the watermark. Returns {role: added}."""
+    return {role: refill_role(role, target) for role, _ in get_roles_below_watermark(_low_watermark())}
+
+
+def _refill_worker():
+    while True:
+        role = _refill_queue.get()
+        try:
+            refill_role(role)
+        except Exception as e:
+            print(f"Question bank refill failed for {role!r}: {e}")
+        finally:
+            with _pending_lock:
+                _pending_roles.discard(normalize_role(role))
+            _refill_queue.task_done()
+
+
+def schedule_refill(role):
+    """Queue a background refill for `role` unless one is already pending"""
+    global _worker
+    with _pending_lock:
+        role_key = normalize_role(role)
+        if role_key in _pending_roles:
+            return
+        _pending_roles.add(role_key)
+        if _worker is None:
+            _worker = threading.Thread(target=_refill_worker, name='question-bank-refill', daemon=True)
+            _worker.start()
+    _refill_queue.put(role)
+
+
+def get_question(role, user_id=None, exclude=None):
+    """Serve a pooled question the user hasn't seen, or None if the pool has nothing to offer.
+
+    Falls back to nothing rather than a live LLM call so the caller decides; a
+    refill is scheduled whenever the pool runs low or comes up empty.
+    """
+    role_key = normalize_role(role)
+    if not role_key:
+        return None
+    doc = pick_unseen_question(role_key, user_id=user_id, exclude_questions=exclude)
+    if doc is None or count_questions(role_key) < _low_watermark():
+        schedule_refill(role)
+    if doc is None:
+        return None
+    if user_id:
+        mark_question_seen(user_id, role_key, doc['_id'])
+    return doc['question']
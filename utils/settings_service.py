@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+
+from mongo_client import mongo
+
+# Singleton documents in the `settings` collection, keyed by `type`
+SETTINGS_DOC_TYPES = ('ai_config', 'feature_toggles')
+# Bumped on every settings write so other processes can poll one tiny document
+VERSION_DOC_TYPE = 'settings_version'
+
+
+def _poll_interval():
+    return float(os.getenv('SETTINGS_POLL_INTERVAL', '5'))
+
+
+def _change_stream_enabled():
+    return os.getenv('SETTINGS_CHANGE_STREAM', 'true').lower() not in ('0', 'false', 'no')
+
+
+class SettingsService:
+    """In-process snapshot of system_settings plus the ai_config/feature_toggles documents.
+
+    Reads are dict lookups. The snapshot is reloaded when a change stream on the two
+    collections reports a write, or (without a replica set) when the settings_version
+    document, checked at most every `poll_interval` seconds, has moved on.
+    """
+
+    def __init__(self, poll_interval=None, use_change_stream=None):
+        self.poll_interval = _poll_interval() if poll_interval is None else poll_interval
+        self.use_change_stream = _change_stream_enabled() if use_change_stream is None else use_change_stream
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._watcher = None
+        self._watching = False
+
+    # --- refresh ---
+
+    def _read_version(self):
+        doc = mongo.db.settings.find_one({'type': VERSION_DOC_TYPE}, {'version': 1})
+        return doc.get('version', 0) if doc else 0
+
+    def _load(self):
+        system = {doc['setting_key']: doc.get('setting_value') for doc in mongo.db.system_settings.find(
+            {}, {'setting_key': 1, 'setting_value': 1}) if 'setting_key' in doc}
+        docs = {doc['type']: doc for doc in mongo.db.settings.find(
+            {'type': {'$in': list(SETTINGS_DOC_TYPES)}}, {'_id': 0})}
+        return {'system': system, **{t: docs.get(t, {}) for t in SETTINGS_DOC_TYPES}}
+
+    def _current(self):
+        now = time.monotonic()
+        if self._snapshot is not None and not self._stale and (
+                self._watching or now - self._checked_at < self.poll_interval):
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is not None and not self._stale and (
+                    self._watching or now - self._checked_at < self.poll_interval):
+                return self._snapshot
+            self._start_watcher()
+            try:
+                version = self._read_version()
+                if self._snapshot is None or self._stale or version != self._version:
+                    # Clear the flag first so a change arriving mid-load forces another reload
+                    self._stale = False
+                    self._snapshot = self._load()
+                    self._version = version
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                print(f"Settings refresh failed, serving the previous snapshot: {e}")
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def _start_watcher(self):
+        if self._watcher is not None or not self.use_change_stream:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='settings-watch', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        pipeline = [{'$match': {'ns.coll': {'$in': ['settings', 'system_settings']}}}]
+        opened = False
+        try:
+            with mongo.db.watch(pipeline) as stream:
+                opened = self._watching = True
+                # Anything written between the first load and the stream opening
+                self._stale = True
+                for _ in stream:
+                    self._stale = True
+        except Exception as e:
+            # Standalone servers have no change streams; the versioned poll covers them
+            print(f"Settings change stream unavailable, polling every {self.poll_interval}s: {e}")
+        finally:
+            self._watching = False
+            self._stale = True
+            if opened:
+                # The stream worked before, so let the next read start a new one
+                self._watcher = None
+
+    def invalidate(self):
+        """Force a reload on the next read (called after local writes)"""
+        self._stale = True
+
+    def bump_version(self):
+        """Record a settings write for processes that poll instead of watching"""
+        mongo.db.settings.update_one({'type': VERSION_DOC_TYPE}, {'$inc': {'version': 1}}, upsert=True)
+        self.invalidate()
+
+    # --- typed accessors ---
+
+    def snapshot(self):
+        current = self._current()
+        return {key: dict(value) for key, value in current.items()}
+
+    def get(self, key, default=None):
+        """Raw system_settings value (stored as a string) or `default`"""
+        return self._current()['system'].get(key, default)
+
+    def get_str(self, key, default=''):
+        value = self.get(key)
+        return default if value is None else str(value)
+
+    def get_bool(self, key, default=False):
+        value = self.get(key)
+        if value is None:
+            return default
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+    def get_int(self, key, default=0):
+        try:
+            return int(self.get(key))
+        except (TypeError, ValueError):
+            return default
+
+    def get_float(self, key, default=0.0):
+        try:
+            return float(self.get(key))
+        except (TypeError, ValueError):
+            return default
+
+    def ai_config(self):
+        """The admin AI settings document (ai_model, temperature, response_length), {} if unset"""
+        return dict(self._current()['ai_config'])
+
+    def feature_enabled(self, name, default=True):
+        """Admin feature toggle (speech_to_speech, text_chat, feedback, analytics, auto_refresh)"""
+        value = self._current()['feature_toggles'].get(name)
+        return default if value is None else bool(value)
+
+
+settings_service = SettingsService()
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def _whisper_default_model():
+    return os.getenv('WHISPER_MODEL', 'base')
+
+
+def _whisper_idle_timeout():
+    # Seconds a model may sit unused before it is unloaded; 0 disables eviction.
+    return float(os.getenv('WHISPER_IDLE_TIMEOUT', '0'))
+
+
+def _whisper_max_memory_mb():
+    # Upper bound for all resident models combined; 0 means unlimited.
+    return float(os.getenv('WHISPER_MAX_MEMORY_MB', '0'))
+
+
+# Approximate fp32 footprint of the released checkpoints, used to make room before a
+# model has been loaded (and measured) in this process.
+_KNOWN_SIZES_MB = {'tiny': 150, 'base': 290, 'small': 970, 'medium': 3060, 'large': 6170, 'turbo': 3240}
+
+
+def _expected_size_bytes(name):
+    base = name.split('.', 1)[0].split('-', 1)[0]
+    return _KNOWN_SIZES_MB.get(base, 0) * 1024 * 1024
+
+
+def _model_size_bytes(model):
+    """Approximate resident size of a whisper model from its parameters and buffers"""
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return total
+    except Exception:
+        return 0
+
+
+class WhisperModelRegistry:
+    """Process-wide cache of loaded whisper models, keyed by model size name.
+
+    With an idle timeout, a daemon reaper unloads models that have not been used for
+    that long, whether or not anything else is transcribed. The memory cap is applied
+    before loading, from the checkpoint's known (or last measured) size, so old and
+    new models are not resident together beyond it.
+    """
+
+    def __init__(self, idle_timeout=None, max_memory_mb=None):
+        self.idle_timeout = _whisper_idle_timeout() if idle_timeout is None else idle_timeout
+        self.max_memory_mb = _whisper_max_memory_mb() if max_memory_mb is None else max_memory_mb
+        # name -> {'model', 'size', 'last_used'}; ordered from least to most recently used
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._measured = {}
+        self._reaper = None
+
+    def get(self, name=None):
+        """Return the model for `name`, loading it on first use"""
+        name = name or _whisper_default_model()
+        with self._lock:
+            entry = self._touch(name)
+            if entry:
+                return entry['model']
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Load outside the registry lock so other sizes stay available meanwhile.
+        with load_lock:
+            with self._lock:
+                entry = self._touch(name)
+                if entry:
+                    return entry['model']
+                self._make_room(self._measured.get(name) or _expected_size_bytes(name))
+            # Imported here so torch/whisper only load in processes that transcribe.
+            import whisper
+            model = whisper.load_model(name)
+            with self._lock:
+                size = _model_size_bytes(model)
+                self._measured[name] = size
+                self._models[name] = {'model': model, 'size': size, 'last_used': time.monotonic()}
+                # The estimate may have been short; trim again, never the model just loaded
+                self._enforce_memory_cap(keep=name)
+                self._start_reaper()
+            return model
+
+    def evict(self, name):
+        """Drop a resident model; in-flight transcriptions keep their reference"""
+        with self._lock:
+            return self._models.pop(name, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def loaded_models(self):
+        """Return {name: size_in_bytes} for the currently resident models"""
+        with self._lock:
+            return {name: entry['size'] for name, entry in self._models.items()}
+
+    def _touch(self, name):
+        entry = self._models.get(name)
+        if entry:
+            entry['last_used'] = time.monotonic()
+            self._models.move_to_end(name)
+        return entry
+
+    def _start_reaper(self):
+        if self._reaper is not None or not self.idle_timeout:
+            return
+        self._reaper = threading.Thread(target=self._reap, name='whisper-reaper', daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        # Checking twice per timeout keeps an idle model resident for at most 1.5x the timeout
+        while True:
+            time.sleep(self.idle_timeout / 2)
+            self._evict_idle()
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for name in [n for n, e in self._models.items() if e['last_used'] < cutoff]:
+                del self._models[name]
+
+    def _make_room(self, incoming):
+        """Evict least recently used models until `incoming` more bytes fit under the cap"""
+        if not self.max_memory_mb:
+            return
+        limit = self.max_memory_mb * 1024 * 1024
+        total = sum(e['size'] for e in self._models.values())
+        while self._models and total + incoming > limit:
+            _, entry = self._models.popitem(last=False)
+            total -= entry['size']
+
+    def _enforce_memory_cap(self, keep):
+        if not self.max_memory_mb:
+            return
+        limit = self.max_memory_mb * 1024 * 1024
+        total = sum(e['size'] for e in self._models.values())
+        # Evict least recently used models first; the model just loaded always stays.
+        for name in list(self._models.keys()):
+            if total <= limit:
+                break
+            if name == keep:
+                continue
+            total -= self._models.pop(name)['size']
+
+
+whisper_registry = WhisperModelRegistry()
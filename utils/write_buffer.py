@@ -0,0 +1,168 @@
+import atexit
+import os
+import threading
+
+from bson import ObjectId
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError, PyMongoError
+from mongo_client import mongo
+
+DUPLICATE_KEY = 11000
+
+
+def _buffer_enabled():
+    return os.getenv('WRITE_BUFFER_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+
+def _buffer_size():
+    return int(os.getenv('WRITE_BUFFER_SIZE', '100'))
+
+
+def _buffer_interval():
+    return float(os.getenv('WRITE_BUFFER_INTERVAL', '0.5'))
+
+
+def _write_concern_from_env(collection):
+    """WRITE_CONCERN_<COLLECTION>, e.g. "1", "majority" or "majority:j" (journaled)"""
+    value = os.getenv(f'WRITE_CONCERN_{collection.upper()}')
+    if not value:
+        return None
+    w, _, journal = value.partition(':')
+    return WriteConcern(w=int(w) if w.isdigit() else w, j=True if journal == 'j' else None)
+
+
+class WriteBuffer:
+    """Coalesces inserts from request threads into one unordered insert_many per collection.
+
+    Documents get their _id when queued, so callers can still return it and a retried
+    batch is idempotent (duplicate-key errors on retry are ignored). A daemon thread
+    flushes every `interval` seconds or as soon as `max_docs` documents are waiting;
+    whatever is still buffered is flushed at interpreter exit.
+    """
+
+    def __init__(self, max_docs=None, interval=None, enabled=None):
+        self.max_docs = _buffer_size() if max_docs is None else max_docs
+        self.interval = _buffer_interval() if interval is None else interval
+        self.enabled = _buffer_enabled() if enabled is None else enabled
+        self._buffers = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._after_flush = {}
+        self._write_concerns = {}
+        self._worker = None
+        self._closed = False
+
+    def register(self, collection, after_flush=None, write_concern=None):
+        """Hook `after_flush(docs)` to run once docs are stored; set a per-collection WriteConcern"""
+        if after_flush is not None:
+            self._after_flush[collection] = after_flush
+        if write_concern is not None:
+            self._write_concerns[collection] = write_concern
+
+    def _write_concern(self, collection):
+        if collection not in self._write_concerns:
+            self._write_concerns[collection] = _write_concern_from_env(collection)
+        return self._write_concerns[collection]
+
+    def add(self, collection, doc):
+        """Queue one document for insertion and return its _id"""
+        doc.setdefault('_id', ObjectId())
+        if not self.enabled or self._closed:
+            self._write(collection, [doc], raise_errors=True)
+            return doc['_id']
+        with self._cond:
+            self._buffers.setdefault(collection, []).append(doc)
+            self._pending += 1
+            self._start_worker()
+            if self._pending >= self.max_docs:
+                self._cond.notify()
+        return doc['_id']
+
+    def add_many(self, collection, docs):
+        return [self.add(collection, doc) for doc in docs]
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='write-buffer', daemon=True)
+            self._worker.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._pending < self.max_docs and not self._closed:
+                    self._cond.wait(self.interval)
+                if self._closed and not self._pending:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of documents stored"""
+        with self._flush_lock:
+            with self._cond:
+                batches, self._buffers, self._pending = self._buffers, {}, 0
+            return sum(self._write(collection, docs) for collection, docs in batches.items())
+
+    def _requeue(self, collection, docs):
+        with self._cond:
+            # Bound what a long outage can pile up; the oldest documents are dropped first
+            buffered = self._buffers.setdefault(collection, [])
+            room = max(0, self.max_docs * 10 - len(buffered))
+            kept = docs[-room:] if room else []
+            self._buffers[collection] = kept + buffered
+            self._pending += len(kept)
+        if len(kept) < len(docs):
+            print(f"Write buffer dropped {len(docs) - len(kept)} {collection} documents")
+
+    def _write(self, collection, docs, raise_errors=False):
+        target = mongo.db[collection]
+        write_concern = self._write_concern(collection)
+        if write_concern is not None:
+            target = target.with_options(write_concern=write_concern)
+        stored = docs
+        try:
+            target.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            if raise_errors:
+                raise
+            failed = {err['index'] for err in e.details.get('writeErrors', [])}
+            real = [err for err in e.details.get('writeErrors', []) if err.get('code') != DUPLICATE_KEY]
+            if real:
+                print(f"Write buffer insert into {collection} failed for {len(real)} documents: {real[0].get('errmsg')}")
+            # Duplicates were stored by an earlier attempt and already reported
+            stored = [doc for i, doc in enumerate(docs) if i not in failed]
+        except PyMongoError as e:
+            if raise_errors:
+                raise
+            if self.enabled and not self._closed:
+                print(f"Write buffer flush of {collection} failed, will retry: {e}")
+                self._requeue(collection, docs)
+            else:
+                print(f"Write buffer lost {len(docs)} {collection} documents: {e}")
+            return 0
+        hook = self._after_flush.get(collection)
+        if hook and stored:
+            try:
+                hook(stored)
+            except Exception as e:
+                print(f"Write buffer after_flush hook for {collection} failed: {e}")
+        return len(stored)
+
+    def close(self):
+        """Stop buffering and flush what is left (registered with atexit)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'pending': self._pending,
+                'by_collection': {name: len(docs) for name, docs in self._buffers.items()}
+            }
+
+
+write_buffer = WriteBuffer()